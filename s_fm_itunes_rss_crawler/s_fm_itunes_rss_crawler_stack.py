@@ -49,6 +49,7 @@ class SFmItunesRssCrawlerStack(Stack):
         self.build_database()
         self.build_podcast_preparation_component()
         self.build_podcast_scraper_component()
+        self.build_episode_archival_component()
 
     def build_vpc(self):
         self.vpc = Vpc(
@@ -108,7 +109,9 @@ class SFmItunesRssCrawlerStack(Stack):
         itunes_category_parser_lambda.add_event_source(SqsEventSource(category_queue))
 
         itunes_popular_podcast_parser_lambda.add_event_source(
-            SqsEventSource(popular_podcasts_fetch_queue)
+            SqsEventSource(
+                popular_podcasts_fetch_queue, report_batch_item_failures=True
+            )
         )
 
         Rule(
@@ -196,6 +199,7 @@ class SFmItunesRssCrawlerStack(Stack):
             vpc_id=self.vpc.vpc_id,
             env_variables={
                 "NUMBER_OF_PARALLEL_TASKS": 5,
+                "PODCASTS_PER_TASK": 25,
                 "ECS_CLUSTER": ecs_cluster.cluster_name,
                 "SECURITY_GROUP": self.security_group_1.security_group_id,
                 "ECS_TASK_SUBNET_1": private_subnet_id,
@@ -205,7 +209,7 @@ class SFmItunesRssCrawlerStack(Stack):
 
         run_ecs_task_policy = PolicyStatement(
             effect=Effect.ALLOW,
-            actions=["ecs:RunTask", "iam:GetRole", "iam:PassRole"],
+            actions=["ecs:RunTask", "ecs:ListTasks", "iam:GetRole", "iam:PassRole"],
             resources=["*"],
         )
 
@@ -223,6 +227,35 @@ class SFmItunesRssCrawlerStack(Stack):
             targets=[EventTargetSqsQueue(podcast_scraper_queue)],
         )
 
+    def build_episode_archival_component(self):
+        episode_archival_queue = Queue(
+            self,
+            "episode-archival-queue",
+            visibility_timeout=Duration.seconds(LAMBDA_TIMEOUT_IN_SECONDS * 2),
+        )
+
+        episode_archiver_lambda = self.build_lambda(
+            "episode_archiver_lambda",
+            "episode_archiver.py",
+            vpc_id=self.vpc.vpc_id,
+            env_variables={
+                "DB_USERNAME": "postgres",
+                "DB_PASSWORD": self.database_credentials_secret.secret_value,
+                "DB_HOST": f"{self.db.db_instance_endpoint_address}:{self.db.db_instance_endpoint_port}",
+                "DB_NAME": "scraper_podcasts",
+                "EPISODE_RETENTION_DAYS": 365,
+            },
+        )
+
+        episode_archiver_lambda.add_event_source(SqsEventSource(episode_archival_queue))
+
+        Rule(
+            self,
+            "ArchiveEpisodesRule",
+            schedule=Schedule.cron(day="*", hour="5", minute="0"),
+            targets=[EventTargetSqsQueue(episode_archival_queue)],
+        )
+
     def build_database(self):
         self.database_credentials_secret = Secret(
             self,
@@ -0,0 +1,83 @@
+import os
+import random
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import common.metrics as metrics
+
+try:
+    # urllib3 only decodes `br` encoded responses when brotli is installed
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+connect_timeout = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+read_timeout = float(os.environ.get("HTTP_READ_TIMEOUT", "30"))
+max_retries = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+backoff_factor = float(os.environ.get("HTTP_BACKOFF_FACTOR", "0.5"))
+pooled_hosts = int(os.environ.get("HTTP_POOLED_HOSTS", "10"))
+connections_per_host = int(os.environ.get("HTTP_CONNECTIONS_PER_HOST", "10"))
+
+
+class JitteredRetry(Retry):
+    """Retry with full jitter, so throttled workers don't retry in lockstep."""
+
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super().get_backoff_time())
+
+
+@lru_cache(maxsize=None)
+def get_http_session() -> requests.Session:
+    session = requests.Session()
+
+    # Pool keeps up to `connections_per_host` keep-alive connections per host.
+    # It doesn't block when they are all taken, a connection that is never
+    # returned would stall every later request to the host. Callers that need
+    # a per host cap, like the scraper's HostScheduler, enforce it themselves.
+    adapter = HTTPAdapter(
+        pool_connections=pooled_hosts,
+        pool_maxsize=connections_per_host,
+        pool_block=False,
+        max_retries=JitteredRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        ),
+    )
+
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    return session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", (connect_timeout, read_timeout))
+
+    try:
+        res = get_http_session().get(url, **kwargs)
+    except Exception:
+        metrics.add_host_stats(url, requests=1, errors=1)
+        raise
+
+    # Elapsed time covers connecting, TLS and retries up to the response
+    # headers, streamed bodies are counted by the caller while reading them
+    metrics.add_host_stats(
+        url,
+        requests=1,
+        errors=int(res.status_code >= 400),
+        time_to_headers_ms=res.elapsed.total_seconds() * 1000,
+        bytes=0 if kwargs.get("stream") else len(res.content),
+    )
+
+    return res
@@ -0,0 +1,164 @@
+"""Per invocation metrics of the crawlers.
+
+Timers, counters and per host stats are accumulated during an invocation and
+written as a single CloudWatch embedded metric format (EMF) JSON line when it
+ends. Metrics are enabled with METRICS_ENABLED, otherwise every call goes to
+no-op metrics, which don't measure anything.
+"""
+import os
+import sys
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from threading import Lock
+from urllib.parse import urlsplit
+
+metrics_enabled = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+metrics_namespace = os.environ.get("METRICS_NAMESPACE", "SFmItunesRssCrawler")
+
+
+class Metrics:
+    def __init__(self, service: str):
+        self.service = service
+        self.lock = Lock()
+        self.values = defaultdict(float)
+        self.units = {}
+        self.hosts = defaultdict(lambda: defaultdict(float))
+
+    def add(self, name: str, value: float = 1, unit: str = "Count"):
+        with self.lock:
+            self.values[name] += value
+            self.units[name] = unit
+
+    def add_time(self, name: str, seconds: float):
+        self.add(name, seconds * 1000, "Milliseconds")
+
+    def add_bytes(self, name: str, value: int):
+        self.add(name, value, "Bytes")
+
+    @contextmanager
+    def timer(self, name: str):
+        started_at = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started_at)
+
+    def add_host_stats(self, url: str, **values: float):
+        host = urlsplit(url).netloc
+
+        with self.lock:
+            host_stats = self.hosts[host]
+
+            for name, value in values.items():
+                host_stats[name] += value
+
+    def to_record(self) -> dict:
+        with self.lock:
+            values = dict(self.values)
+            units = dict(self.units)
+            hosts = {host: dict(stats) for host, stats in self.hosts.items()}
+
+        # Per host stats stay plain properties of the record, as a metric
+        # for every host would create a custom metric per feed host
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": metrics_namespace,
+                        "Dimensions": [["Service"]],
+                        "Metrics": [
+                            {"Name": name, "Unit": unit} for name, unit in units.items()
+                        ],
+                    }
+                ],
+            },
+            "Service": self.service,
+            **values,
+            "hosts": hosts,
+        }
+
+    def flush(self):
+        sys.stdout.write(json.dumps(self.to_record()) + "\n")
+        sys.stdout.flush()
+
+
+class NoOpMetrics:
+    timer_context = nullcontext()
+
+    def add(self, name: str, value: float = 1, unit: str = "Count"):
+        pass
+
+    def add_time(self, name: str, seconds: float):
+        pass
+
+    def add_bytes(self, name: str, value: int):
+        pass
+
+    def timer(self, name: str):
+        return self.timer_context
+
+    def add_host_stats(self, url: str, **values: float):
+        pass
+
+    def flush(self):
+        pass
+
+
+no_op_metrics = NoOpMetrics()
+
+# Lambdas and the scraper task handle a single invocation per process at a
+# time, so stages running on other threads report to the same metrics
+current = no_op_metrics
+
+
+@contextmanager
+def invocation(service: str):
+    global current
+
+    previous = current
+    current = Metrics(service) if metrics_enabled else no_op_metrics
+
+    try:
+        yield current
+    finally:
+        current.flush()
+        current = previous
+
+
+def instrument(service: str):
+    """Wraps an entry point, so its invocations emit a metrics record."""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with invocation(service):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def add(name: str, value: float = 1, unit: str = "Count"):
+    current.add(name, value, unit)
+
+
+def add_time(name: str, seconds: float):
+    current.add_time(name, seconds)
+
+
+def add_bytes(name: str, value: int):
+    current.add_bytes(name, value)
+
+
+def timer(name: str):
+    return current.timer(name)
+
+
+def add_host_stats(url: str, **values: float):
+    current.add_host_stats(url, **values)
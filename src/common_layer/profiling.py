@@ -0,0 +1,157 @@
+"""Opt-in profiling of the Lambdas and the scraper task.
+
+PROFILING lists the profilers to run, `cprofile`, `tracemalloc` or both
+separated with a comma. PROFILING_SAMPLE_RATE profiles only a fraction of the
+invocations. Results are logged and, when PROFILING_OUTPUT_DIR is set, also
+written there as a pstats dump and a text report of the allocation sites.
+"""
+import io
+import os
+import sys
+import time
+import random
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+logger = logging.getLogger()
+
+profilers = {
+    profiler.strip()
+    for profiler in os.environ.get("PROFILING", "").lower().split(",")
+    if profiler.strip()
+}
+sample_rate = float(os.environ.get("PROFILING_SAMPLE_RATE", "1"))
+output_dir = os.environ.get("PROFILING_OUTPUT_DIR")
+top_entries = int(os.environ.get("PROFILING_TOP_ENTRIES", "30"))
+tracemalloc_frames = int(os.environ.get("PROFILING_TRACEMALLOC_FRAMES", "5"))
+snapshot_interval = float(os.environ.get("PROFILING_SNAPSHOT_INTERVAL", "1"))
+
+
+def write_report(name: str, suffix: str, report: str):
+    logger.info(f"Profile {suffix} of {name}:\n{report}")
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+        with open(os.path.join(output_dir, f"{name}.{suffix}.txt"), "w") as file:
+            file.write(report)
+
+
+@contextmanager
+def cpu_profile(name: str):
+    import cProfile
+    import pstats
+
+    thread_profilers = []
+
+    # cProfile only sees the thread it was enabled on, so every thread started
+    # during the invocation, like stages and executor workers, gets its own
+    def profile_thread(*args):
+        profiler = cProfile.Profile()
+        thread_profilers.append(profiler)
+        sys.setprofile(None)
+        profiler.enable()
+
+    profiler = cProfile.Profile()
+    threading.setprofile(profile_thread)
+    profiler.enable()
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+
+        stats = pstats.Stats(profiler)
+
+        for thread_profiler in thread_profilers:
+            stats.add(thread_profiler)
+
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            stats.dump_stats(os.path.join(output_dir, f"{name}.prof"))
+
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(top_entries)
+
+        write_report(name, "cprofile", report.getvalue())
+
+
+@contextmanager
+def memory_profile(name: str):
+    import tracemalloc
+
+    done = threading.Event()
+    largest = {"size": 0, "snapshot": None}
+
+    # Memory held at the end of an invocation is mostly released already, so
+    # the snapshot taken closest to the peak is the one reported
+    def take_snapshots():
+        while not done.wait(snapshot_interval):
+            size, _ = tracemalloc.get_traced_memory()
+
+            if size > largest["size"]:
+                largest["size"] = size
+                largest["snapshot"] = tracemalloc.take_snapshot()
+
+    tracemalloc.start(tracemalloc_frames)
+    snapshots = threading.Thread(target=take_snapshots, daemon=True)
+    snapshots.start()
+
+    try:
+        yield
+    finally:
+        done.set()
+        snapshots.join()
+
+        size, peak = tracemalloc.get_traced_memory()
+
+        if size >= largest["size"]:
+            largest["size"] = size
+            largest["snapshot"] = tracemalloc.take_snapshot()
+
+        tracemalloc.stop()
+
+        lines = [
+            f"Peak traced memory: {peak / 2 ** 20:.1f} MiB, "
+            f"snapshot at {largest['size'] / 2 ** 20:.1f} MiB"
+        ]
+
+        for statistic in largest["snapshot"].statistics("traceback")[:top_entries]:
+            lines.append(str(statistic))
+            lines.extend(f"    {line}" for line in statistic.traceback.format())
+
+        write_report(name, "tracemalloc", "\n".join(lines))
+
+
+def profile(service: str):
+    """Wraps an entry point, so sampled invocations are profiled."""
+
+    def decorator(function):
+        if len(profilers) == 0:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if random.random() >= sample_rate:
+                return function(*args, **kwargs)
+
+            name = f"{service}-{int(time.time() * 1000)}-{os.getpid()}"
+
+            with ExitStack() as stack:
+                # Allocations are traced around the CPU profile, so the
+                # profiler's own memory ends up in the report as little as possible
+                if "tracemalloc" in profilers:
+                    stack.enter_context(memory_profile(name))
+
+                if "cprofile" in profilers:
+                    stack.enter_context(cpu_profile(name))
+
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
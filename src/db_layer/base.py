@@ -1,28 +1,50 @@
 import os
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from alembic.config import Config
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.orm.session import Session as SessionType
+
+if TYPE_CHECKING:
+    from alembic.config import Config
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.orm.session import Session as SessionType
 
 path = os.path.abspath(__file__)
 directory = os.path.dirname(path)
 
-alembic_cfg = Config(f"{directory}/alembic.ini")
-alembic_cfg.set_main_option("script_location", f"{directory}/migration")
-
 db_dialect = os.environ.get("DB_DIALECT", "postgresql")
 db_username = os.environ.get("DB_USERNAME", "postgres")
 db_password = os.environ.get("DB_PASSWORD", "Pass2022!")
 db_host = os.environ.get("DB_HOST", "localhost:5432")
 db_name = os.environ.get("DB_NAME", "scraper_test")
 
-engine = create_engine(
-    f"{db_dialect}://{db_username}:{db_password}@{db_host}/{db_name}"
-)
 
-Session = sessionmaker(bind=engine)
+# Engine, session factory and Alembic config are built on first use, which
+# keeps them out of cold starts of Lambdas and tasks that don't need them
+@lru_cache(maxsize=None)
+def get_alembic_config() -> "Config":
+    from alembic.config import Config
+
+    alembic_cfg = Config(f"{directory}/alembic.ini")
+    alembic_cfg.set_main_option("script_location", f"{directory}/migration")
+
+    return alembic_cfg
+
+
+@lru_cache(maxsize=None)
+def get_engine() -> "Engine":
+    return create_engine(
+        f"{db_dialect}://{db_username}:{db_password}@{db_host}/{db_name}",
+        pool_size=int(os.environ.get("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_session_factory() -> sessionmaker:
+    return sessionmaker(bind=get_engine())
 
 
-def get_session() -> SessionType:
-    return Session() 
+def get_session() -> "SessionType":
+    return get_session_factory()()
@@ -1,3 +1,4 @@
+import re
 from alembic import context
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
@@ -31,6 +32,13 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = models.Base.metadata
 
+# Partitions are created by migrations and have no models of their own
+PARTITION_TABLE_NAME = re.compile(r"^podcast_episode_p\d+$")
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    return not (type_ == "table" and reflected and PARTITION_TABLE_NAME.match(name))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +61,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -75,7 +84,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
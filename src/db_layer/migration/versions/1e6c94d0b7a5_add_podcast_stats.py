@@ -0,0 +1,73 @@
+"""Add podcast stats
+
+Revision ID: 1e6c94d0b7a5
+Revises: f4b71c3e8a26
+Create Date: 2026-10-18 19:08:51.902337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "1e6c94d0b7a5"
+down_revision = "f4b71c3e8a26"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "podcast_stats",
+        sa.Column("podcast_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("episode_count", sa.Integer(), nullable=False),
+        sa.Column("earliest_published_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("latest_published_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("latest_external_id", sa.String(length=500), nullable=True),
+        sa.Column("average_publishing_interval", sa.Interval(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["podcast_id"],
+            ["podcast.id"],
+        ),
+        sa.PrimaryKeyConstraint("podcast_id"),
+    )
+
+    # Stats of already scraped podcasts are computed once, from then on the
+    # scraper keeps them up to date
+    op.execute(
+        """
+        INSERT INTO podcast_stats (
+            podcast_id,
+            episode_count,
+            earliest_published_date,
+            latest_published_date,
+            latest_external_id,
+            average_publishing_interval
+        )
+        SELECT
+            podcast_id,
+            count(*),
+            min(published_date),
+            max(published_date),
+            (array_agg(external_id ORDER BY published_date DESC NULLS LAST))[1],
+            (max(published_date) - min(published_date))
+                / nullif(count(published_date) - 1, 0)
+        FROM (
+            SELECT podcast_id, published_date, external_id FROM podcast_episode
+            UNION ALL
+            SELECT podcast_id, published_date, external_id FROM podcast_episode_archive
+        ) episode
+        GROUP BY podcast_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("podcast_stats")
@@ -0,0 +1,41 @@
+"""Index podcast episode archive external id
+
+Revision ID: 3a8c1e5f9b24
+Revises: 9d4a6f2b0e57
+Create Date: 2026-10-18 23:16:05.740218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3a8c1e5f9b24"
+down_revision = "9d4a6f2b0e57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_podcast_episode_archive_podcast_id_external_id",
+        "podcast_episode_archive",
+        ["podcast_id", "external_id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_podcast_episode_archive_podcast_id", table_name="podcast_episode_archive"
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_podcast_episode_archive_podcast_id",
+        "podcast_episode_archive",
+        ["podcast_id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_podcast_episode_archive_podcast_id_external_id",
+        table_name="podcast_episode_archive",
+    )
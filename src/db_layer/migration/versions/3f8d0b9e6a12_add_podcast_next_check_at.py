@@ -0,0 +1,36 @@
+"""Add podcast next check at
+
+Revision ID: 3f8d0b9e6a12
+Revises: e2a87d5c31f0
+Create Date: 2026-10-18 12:40:55.361720
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f8d0b9e6a12"
+down_revision = "e2a87d5c31f0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "podcast",
+        sa.Column(
+            "next_check_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        op.f("ix_podcast_next_check_at"), "podcast", ["next_check_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_podcast_next_check_at"), table_name="podcast")
+    op.drop_column("podcast", "next_check_at")
@@ -0,0 +1,33 @@
+"""Add podcast feed validators
+
+Revision ID: 5b1e2c7a9d34
+Revises: 0d6213bec915
+Create Date: 2026-10-18 09:12:41.204816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5b1e2c7a9d34"
+down_revision = "0d6213bec915"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("podcast", sa.Column("etag", sa.String(length=500), nullable=True))
+    op.add_column(
+        "podcast", sa.Column("last_modified", sa.String(length=100), nullable=True)
+    )
+    op.add_column(
+        "podcast",
+        sa.Column("last_checked_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("podcast", "last_checked_at")
+    op.drop_column("podcast", "last_modified")
+    op.drop_column("podcast", "etag")
@@ -0,0 +1,42 @@
+"""Order podcast episode published date index
+
+Revision ID: 7b3e9a41c2d8
+Revises: 1e6c94d0b7a5
+Create Date: 2026-10-18 21:12:40.553912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7b3e9a41c2d8"
+down_revision = "1e6c94d0b7a5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Known episodes are read newest first with undated ones last, which a
+    # backward scan of the ascending index can't return without sorting
+    op.drop_index(
+        "ix_podcast_episode_podcast_id_published_date", table_name="podcast_episode"
+    )
+    op.create_index(
+        "ix_podcast_episode_podcast_id_published_date",
+        "podcast_episode",
+        ["podcast_id", sa.text("published_date DESC NULLS LAST")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_podcast_episode_podcast_id_published_date", table_name="podcast_episode"
+    )
+    op.create_index(
+        "ix_podcast_episode_podcast_id_published_date",
+        "podcast_episode",
+        ["podcast_id", "published_date"],
+        unique=False,
+    )
@@ -0,0 +1,41 @@
+"""Add podcast episode unique external id
+
+Revision ID: 9c4f1a6e2b87
+Revises: 5b1e2c7a9d34
+Create Date: 2026-10-18 10:03:17.550321
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c4f1a6e2b87"
+down_revision = "5b1e2c7a9d34"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Duplicates created by earlier scrapes would make the index creation fail
+    op.execute(
+        """
+        DELETE FROM podcast_episode duplicate
+        USING podcast_episode original
+        WHERE duplicate.podcast_id = original.podcast_id
+          AND duplicate.external_id = original.external_id
+          AND duplicate.id > original.id
+        """
+    )
+    op.create_index(
+        "ix_podcast_episode_podcast_id_external_id",
+        "podcast_episode",
+        ["podcast_id", "external_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_podcast_episode_podcast_id_external_id", table_name="podcast_episode"
+    )
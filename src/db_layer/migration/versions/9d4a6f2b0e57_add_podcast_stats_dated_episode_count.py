@@ -0,0 +1,53 @@
+"""Add podcast stats dated episode count
+
+Revision ID: 9d4a6f2b0e57
+Revises: 7b3e9a41c2d8
+Create Date: 2026-10-18 22:04:17.386120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9d4a6f2b0e57"
+down_revision = "7b3e9a41c2d8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "podcast_stats",
+        sa.Column(
+            "dated_episode_count", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.alter_column("podcast_stats", "dated_episode_count", server_default=None)
+
+    # Average publishing interval is recomputed from dated episodes only, the
+    # same way the scraper updates it
+    op.execute(
+        """
+        UPDATE podcast_stats
+        SET dated_episode_count = episode.dated_episode_count,
+            average_publishing_interval = (
+                (latest_published_date - earliest_published_date)
+                / nullif(episode.dated_episode_count - 1, 0)
+            )
+        FROM (
+            SELECT podcast_id, count(published_date) AS dated_episode_count
+            FROM (
+                SELECT podcast_id, published_date FROM podcast_episode
+                UNION ALL
+                SELECT podcast_id, published_date FROM podcast_episode_archive
+            ) episode
+            GROUP BY podcast_id
+        ) episode
+        WHERE episode.podcast_id = podcast_stats.podcast_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("podcast_stats", "dated_episode_count")
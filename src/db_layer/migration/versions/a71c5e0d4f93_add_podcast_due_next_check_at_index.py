@@ -0,0 +1,34 @@
+"""Add podcast due next check at index
+
+Revision ID: a71c5e0d4f93
+Revises: 3f8d0b9e6a12
+Create Date: 2026-10-18 13:58:20.107446
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a71c5e0d4f93"
+down_revision = "3f8d0b9e6a12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_podcast_due_next_check_at",
+        "podcast",
+        ["next_check_at"],
+        unique=False,
+        postgresql_where=sa.text("status <> 'Inactive'"),
+    )
+    op.drop_index("ix_podcast_next_check_at", table_name="podcast")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_podcast_next_check_at", "podcast", ["next_check_at"], unique=False
+    )
+    op.drop_index("ix_podcast_due_next_check_at", table_name="podcast")
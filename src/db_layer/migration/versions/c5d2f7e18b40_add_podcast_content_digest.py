@@ -0,0 +1,26 @@
+"""Add podcast content digest
+
+Revision ID: c5d2f7e18b40
+Revises: a71c5e0d4f93
+Create Date: 2026-10-18 15:02:17.530942
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c5d2f7e18b40"
+down_revision = "a71c5e0d4f93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "podcast", sa.Column("content_digest", sa.String(length=64), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("podcast", "content_digest")
@@ -0,0 +1,27 @@
+"""Add podcast looked up at
+
+Revision ID: d83a6b2c9f15
+Revises: c5d2f7e18b40
+Create Date: 2026-10-18 16:21:09.684213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d83a6b2c9f15"
+down_revision = "c5d2f7e18b40"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "podcast",
+        sa.Column("looked_up_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("podcast", "looked_up_at")
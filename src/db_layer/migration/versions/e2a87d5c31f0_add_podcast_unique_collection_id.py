@@ -0,0 +1,81 @@
+"""Add podcast unique collection id
+
+Revision ID: e2a87d5c31f0
+Revises: 9c4f1a6e2b87
+Create Date: 2026-10-18 11:26:04.918233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e2a87d5c31f0"
+down_revision = "9c4f1a6e2b87"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Daily chart imports created one podcast row per day, the oldest row of
+    # each collection is kept and episodes of the others are moved onto it
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE podcast_duplicate ON COMMIT DROP AS
+        SELECT id, original_id
+        FROM (
+            SELECT
+                id,
+                first_value(id) OVER (
+                    PARTITION BY collection_id ORDER BY created_at, id
+                ) AS original_id
+            FROM podcast
+        ) podcast_with_original
+        WHERE id <> original_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM podcast_episode episode
+        USING (
+            SELECT
+                podcast_episode.id,
+                row_number() OVER (
+                    PARTITION BY
+                        coalesce(duplicate.original_id, podcast_episode.podcast_id),
+                        podcast_episode.external_id
+                    ORDER BY
+                        duplicate.id IS NOT NULL,
+                        podcast_episode.created_at,
+                        podcast_episode.id
+                ) AS position
+            FROM podcast_episode
+            LEFT JOIN podcast_duplicate duplicate
+                ON duplicate.id = podcast_episode.podcast_id
+            WHERE podcast_episode.external_id IS NOT NULL
+        ) ranked_episode
+        WHERE episode.id = ranked_episode.id AND ranked_episode.position > 1
+        """
+    )
+    op.execute(
+        """
+        UPDATE podcast_episode
+        SET podcast_id = duplicate.original_id
+        FROM podcast_duplicate duplicate
+        WHERE podcast_episode.podcast_id = duplicate.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM podcast
+        USING podcast_duplicate duplicate
+        WHERE podcast.id = duplicate.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_podcast_collection_id", "podcast", ["collection_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_podcast_collection_id", "podcast", type_="unique")
@@ -0,0 +1,182 @@
+"""Partition podcast episode by podcast id
+
+Revision ID: f4b71c3e8a26
+Revises: d83a6b2c9f15
+Create Date: 2026-10-18 17:45:32.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "f4b71c3e8a26"
+down_revision = "d83a6b2c9f15"
+branch_labels = None
+depends_on = None
+
+PARTITIONS = 16
+
+EPISODE_COLUMNS = (
+    "id, title, link, status, published_date, external_id, episode_number, "
+    "episode_duration, podcast_id, created_at, updated_at"
+)
+
+
+def get_episode_columns():
+    return [
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("title", sa.String(length=1024), nullable=True),
+        sa.Column("link", sa.String(length=1024), nullable=True),
+        sa.Column("status", sa.String(length=500), nullable=True),
+        sa.Column("published_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("external_id", sa.String(length=500), nullable=True),
+        sa.Column("episode_number", sa.Integer(), nullable=True),
+        sa.Column("episode_duration", sa.String(length=100), nullable=True),
+        sa.Column("podcast_id", postgresql.UUID(as_uuid=True), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    # Existing table can't be turned into a partitioned one, so it's replaced
+    op.rename_table("podcast_episode", "podcast_episode_unpartitioned")
+    op.execute(
+        "ALTER TABLE podcast_episode_unpartitioned "
+        "RENAME CONSTRAINT podcast_episode_pkey TO podcast_episode_unpartitioned_pkey"
+    )
+    op.drop_index(
+        "ix_podcast_episode_podcast_id_external_id",
+        table_name="podcast_episode_unpartitioned",
+    )
+
+    op.create_table(
+        "podcast_episode",
+        *get_episode_columns(),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["podcast_id"],
+            ["podcast.id"],
+        ),
+        sa.PrimaryKeyConstraint("id", "podcast_id"),
+        postgresql_partition_by="HASH (podcast_id)",
+    )
+
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE podcast_episode_p{remainder} PARTITION OF podcast_episode "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+
+    op.execute(
+        f"INSERT INTO podcast_episode ({EPISODE_COLUMNS}) "
+        f"SELECT {EPISODE_COLUMNS} FROM podcast_episode_unpartitioned"
+    )
+    op.drop_table("podcast_episode_unpartitioned")
+
+    # Indexes are built once the rows are copied, which is faster
+    op.create_index(
+        "ix_podcast_episode_podcast_id_external_id",
+        "podcast_episode",
+        ["podcast_id", "external_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_podcast_episode_podcast_id_published_date",
+        "podcast_episode",
+        ["podcast_id", "published_date"],
+        unique=False,
+    )
+
+    op.create_table(
+        "podcast_episode_archive",
+        *get_episode_columns(),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["podcast_id"],
+            ["podcast.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_podcast_episode_archive_podcast_id",
+        "podcast_episode_archive",
+        ["podcast_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.rename_table("podcast_episode", "podcast_episode_partitioned")
+    op.execute(
+        "ALTER TABLE podcast_episode_partitioned "
+        "RENAME CONSTRAINT podcast_episode_pkey TO podcast_episode_partitioned_pkey"
+    )
+    op.drop_index(
+        "ix_podcast_episode_podcast_id_external_id",
+        table_name="podcast_episode_partitioned",
+    )
+    op.drop_index(
+        "ix_podcast_episode_podcast_id_published_date",
+        table_name="podcast_episode_partitioned",
+    )
+
+    op.create_table(
+        "podcast_episode",
+        *get_episode_columns(),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["podcast_id"],
+            ["podcast.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Archived episodes are brought back, as there is no archive to keep them
+    for table in ("podcast_episode_partitioned", "podcast_episode_archive"):
+        op.execute(
+            f"INSERT INTO podcast_episode ({EPISODE_COLUMNS}) "
+            f"SELECT {EPISODE_COLUMNS} FROM {table}"
+        )
+
+    op.drop_index(
+        "ix_podcast_episode_archive_podcast_id", table_name="podcast_episode_archive"
+    )
+    op.drop_table("podcast_episode_archive")
+    op.drop_table("podcast_episode_partitioned")
+
+    op.create_index(
+        "ix_podcast_episode_podcast_id_external_id",
+        "podcast_episode",
+        ["podcast_id", "external_id"],
+        unique=True,
+    )
@@ -2,7 +2,7 @@ import uuid
 import enum
 from typing import Optional
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index, UniqueConstraint, text
 from sqlalchemy.sql import functions
 from sqlalchemy.orm import relationship
 
@@ -17,6 +17,15 @@ class PodcastStatus(str, enum.Enum):
 
 class Podcast(Base):
     __tablename__ = "podcast"
+    __table_args__ = (
+        UniqueConstraint("collection_id", name="uq_podcast_collection_id"),
+        # Mediator only ever looks for due podcasts which are not inactive
+        Index(
+            "ix_podcast_due_next_check_at",
+            "next_check_at",
+            postgresql_where=text("status <> 'Inactive'"),
+        ),
+    )
 
     id = Column(PostgreSQLUUID, primary_key=True, default=uuid.uuid4)
     collection_id = Column(String(100), nullable=False)
@@ -28,6 +37,12 @@ class Podcast(Base):
     published_date = Column(DateTime(timezone=True))
     podcast_episodes = relationship("PodcastEpisode", back_populates="podcast")
     status = Column(String(500))
+    etag = Column(String(500))
+    last_modified = Column(String(100))
+    content_digest = Column(String(64))
+    looked_up_at = Column(DateTime(timezone=True))
+    last_checked_at = Column(DateTime(timezone=True))
+    next_check_at = Column(DateTime(timezone=True), server_default=functions.now())
     created_at = Column(DateTime(timezone=True), server_default=functions.now())
     updated_at = Column(
         DateTime(timezone=True),
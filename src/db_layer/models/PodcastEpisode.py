@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index
 from sqlalchemy.sql import functions
 from sqlalchemy.orm import relationship
 
@@ -14,6 +14,18 @@ class PodcastEpisodeStatus(str, enum.Enum):
 
 class PodcastEpisode(Base):
     __tablename__ = "podcast_episode"
+    __table_args__ = (
+        Index(
+            "ix_podcast_episode_podcast_id_external_id",
+            "podcast_id",
+            "external_id",
+            unique=True,
+        ),
+        # Per podcast queries only touch a single partition, the partitions
+        # themselves are created by migrations. Partitioning requires
+        # `podcast_id` in the primary key and every unique index.
+        {"postgresql_partition_by": "HASH (podcast_id)"},
+    )
 
     id = Column(PostgreSQLUUID, primary_key=True, default=uuid.uuid4)
     title = Column(String(1024))
@@ -23,7 +35,7 @@ class PodcastEpisode(Base):
     external_id = Column(String(500))
     episode_number = Column(Integer())
     episode_duration = Column(String(100))
-    podcast_id = Column(PostgreSQLUUID, ForeignKey("podcast.id"), nullable=False)
+    podcast_id = Column(PostgreSQLUUID, ForeignKey("podcast.id"), primary_key=True)
     podcast = relationship("Podcast", back_populates="podcast_episodes")
     created_at = Column(DateTime(timezone=True), server_default=functions.now())
     updated_at = Column(
@@ -54,3 +66,11 @@ class PodcastEpisode(Base):
 
     def __repr__(self) -> str:
         return self.title
+
+
+# Latest episodes are read newest first, undated ones last
+Index(
+    "ix_podcast_episode_podcast_id_published_date",
+    PodcastEpisode.podcast_id,
+    PodcastEpisode.published_date.desc().nullslast(),
+)
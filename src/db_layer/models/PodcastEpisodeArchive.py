@@ -0,0 +1,34 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index
+from sqlalchemy.sql import functions
+
+from .Base import Base, PostgreSQLUUID
+
+
+# Old episodes of inactive podcasts are moved here by the episode archiver
+class PodcastEpisodeArchive(Base):
+    __tablename__ = "podcast_episode_archive"
+    __table_args__ = (
+        # Scraper skips episodes that are archived already
+        Index(
+            "ix_podcast_episode_archive_podcast_id_external_id",
+            "podcast_id",
+            "external_id",
+        ),
+    )
+
+    id = Column(PostgreSQLUUID, primary_key=True, default=uuid.uuid4)
+    title = Column(String(1024))
+    link = Column(String(1024))
+    status = Column(String(500))
+    published_date = Column(DateTime(timezone=True))
+    external_id = Column(String(500))
+    episode_number = Column(Integer())
+    episode_duration = Column(String(100))
+    podcast_id = Column(PostgreSQLUUID, ForeignKey("podcast.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=functions.now())
+
+    def __repr__(self) -> str:
+        return self.title
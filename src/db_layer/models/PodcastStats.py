@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime, Integer, Interval, ForeignKey
+from sqlalchemy.sql import functions
+
+from .Base import Base, PostgreSQLUUID
+
+
+# Summary of podcast's episodes, maintained by the scraper as it inserts new
+# ones. Archived episodes stay counted, as they are still podcast's episodes.
+class PodcastStats(Base):
+    __tablename__ = "podcast_stats"
+
+    podcast_id = Column(PostgreSQLUUID, ForeignKey("podcast.id"), primary_key=True)
+    episode_count = Column(Integer(), nullable=False)
+    # Undated episodes don't take part in the average publishing interval
+    dated_episode_count = Column(Integer(), nullable=False)
+    earliest_published_date = Column(DateTime(timezone=True))
+    latest_published_date = Column(DateTime(timezone=True))
+    latest_external_id = Column(String(500))
+    average_publishing_interval = Column(Interval())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=functions.now(),
+        onupdate=functions.now(),
+    )
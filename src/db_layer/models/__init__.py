@@ -1,3 +1,5 @@
 from .Base import Base, PostgreSQLUUID
 from .Podcast import Podcast, PodcastStatus
-from .PodcastEpisode import PodcastEpisode, PodcastEpisodeStatus
\ No newline at end of file
+from .PodcastEpisode import PodcastEpisode, PodcastEpisodeStatus
+from .PodcastEpisodeArchive import PodcastEpisodeArchive
+from .PodcastStats import PodcastStats
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import logging
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from db.base import get_session
+import db.models as models
+import common.metrics as metrics
+import common.profiling as profiling
+
+logging.basicConfig(level=logging.NOTSET)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+EPISODE_COLUMNS = (
+    "id, title, link, status, published_date, external_id, episode_number, "
+    "episode_duration, podcast_id, created_at, updated_at"
+)
+
+# Leaves room to finish the running batch before the Lambda times out
+REMAINING_TIME_RESERVE_IN_MILLIS = 60 * 1000
+
+
+def archive_episodes(retention: timedelta, batch_size: int) -> int:
+    """Moves a batch of old episodes of inactive podcasts to the archive.
+
+    Podcasts are inactive when they are marked so or when their latest
+    episode, kept in podcast stats, is older than the retention. Rows are
+    deleted and inserted in one statement, so an episode is never in both
+    tables or in neither of them.
+    """
+    archive_statement = text(f"""
+        WITH archived AS (
+            DELETE FROM podcast_episode
+            WHERE (id, podcast_id) IN (
+                SELECT episode.id, episode.podcast_id
+                FROM podcast_episode episode
+                JOIN podcast ON podcast.id = episode.podcast_id
+                LEFT JOIN podcast_stats stats ON stats.podcast_id = podcast.id
+                WHERE episode.published_date < now() - :retention
+                  AND (
+                    podcast.status = :inactive
+                    OR stats.latest_published_date < now() - :retention
+                  )
+                LIMIT :batch_size
+            )
+            RETURNING {EPISODE_COLUMNS}
+        )
+        INSERT INTO podcast_episode_archive ({EPISODE_COLUMNS})
+        SELECT {EPISODE_COLUMNS} FROM archived
+        """)
+
+    session = get_session()
+
+    with session.begin():
+        result = session.execute(
+            archive_statement,
+            {
+                "inactive": models.PodcastStatus.Inactive.value,
+                "retention": retention,
+                "batch_size": batch_size,
+            },
+        )
+
+    return result.rowcount
+
+
+@profiling.profile("episode_archiver")
+@metrics.instrument("episode_archiver")
+def lambda_handler(event, context):
+    retention = timedelta(days=int(os.environ.get("EPISODE_RETENTION_DAYS", "365")))
+    batch_size = int(os.environ.get("ARCHIVE_BATCH_SIZE", "5000"))
+
+    number_of_archived_episodes = 0
+
+    # Short batches keep locks and transactions small, archiving continues
+    # with the next scheduled run if it doesn't finish in time
+    while (
+        context is None
+        or context.get_remaining_time_in_millis() > REMAINING_TIME_RESERVE_IN_MILLIS
+    ):
+        with metrics.timer("archive_batch"):
+            archived = archive_episodes(retention, batch_size)
+
+        number_of_archived_episodes += archived
+
+        if archived < batch_size:
+            break
+
+    metrics.add("episodes_archived", number_of_archived_episodes)
+    logger.info(f"Archived {number_of_archived_episodes} episodes.")
@@ -1,20 +1,28 @@
 import os
 import json
-import requests
 import logging
-import boto3
+from functools import lru_cache
 from typing import List, Optional
-from pyquery import PyQuery as pq
+
+import common.http_client as http_client
+import common.metrics as metrics
+import common.profiling as profiling
 
 logging.basicConfig(level=logging.NOTSET)
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Largest number of entries SQS accepts in a single batch request
+SQS_BATCH_SIZE = 10
+
+SEND_ATTEMPTS = 3
+
 
 def get_html_content(url: str) -> Optional[bytes]:
     try:
-        res = requests.get(url)
+        res = http_client.get(url)
+        res.raise_for_status()
 
         return res.content
     except Exception as e:
@@ -24,30 +32,63 @@ def get_html_content(url: str) -> Optional[bytes]:
 
 
 def get_links_from_sub_genres(html: bytes) -> List[str]:
+    from pyquery import PyQuery as pq
+
     d = pq(html)
 
-    a_sub_genres_tags = d("#genre-nav ul.list.top-level-subgenres a body")
+    a_sub_genres_tags = d("#genre-nav ul.list.top-level-subgenres a")
 
     links = [i.attr("href") for i in a_sub_genres_tags.items("a")]
 
     return links
 
 
-def send_event_for_parsing_popular_podcasts(event: dict):
-    sqs_client = boto3.client("sqs")
+@lru_cache(maxsize=None)
+def get_sqs_client():
+    # boto3 is the heaviest import here and is only needed once links are found,
+    # the client is kept for the warm invocations of the container
+    import boto3
+
+    return boto3.client("sqs")
+
+
+def send_events_for_parsing_popular_podcasts(events: List[dict]):
+    sqs_client = get_sqs_client()
     queue_url = os.environ.get("POPULAR_PODCASTS_QUEUE_URL")
 
-    try:
-        response = sqs_client.send_message(
-            QueueUrl=queue_url,
-            MessageBody=json.dumps(event),
-        )
+    for i in range(0, len(events), SQS_BATCH_SIZE):
+        entries = [
+            {"Id": str(id), "MessageBody": json.dumps(event)}
+            for id, event in enumerate(events[i : i + SQS_BATCH_SIZE])
+        ]
 
-        logger.info(
-            f"Successfully send event to queue: {queue_url}. Response: {response}"
-        )
-    except Exception as e:
-        logger.error(f"Failed to send event to queue: {queue_url}. Cause: {e}")
+        # Batch requests succeed partially, only the failed entries are resent
+        for _ in range(SEND_ATTEMPTS):
+            try:
+                response = sqs_client.send_message_batch(
+                    QueueUrl=queue_url, Entries=entries
+                )
+            except Exception as e:
+                logger.error(f"Failed to send events to queue: {queue_url}. Cause: {e}")
+                continue
+
+            failed_ids = {failed["Id"] for failed in response.get("Failed", [])}
+            entries = [entry for entry in entries if entry["Id"] in failed_ids]
+
+            metrics.add("events_sent", len(response.get("Successful", [])))
+
+            logger.info(
+                f"Successfully send {len(response.get('Successful', []))} events to queue: {queue_url}."
+            )
+
+            if len(entries) == 0:
+                break
+
+        if len(entries) > 0:
+            metrics.add("events_failed", len(entries))
+            logger.error(
+                f"Failed to send {len(entries)} events to queue: {queue_url}. Events: {[entry['MessageBody'] for entry in entries]}"
+            )
 
 
 def get_clusters_from_links(links: List[str]):
@@ -60,15 +101,23 @@ def get_clusters_from_links(links: List[str]):
     return clusters
 
 
+@profiling.profile("itunes_category_parser")
+@metrics.instrument("itunes_category_parser")
 def lambda_handler(event, context):
-    ITUNES_PODCAST_CATEGORIES_URL = "https://podcasts.apple.com/us/genre/podcasts/id26"
+    ITUNES_PODCAST_CATEGORIES_URL = os.environ.get(
+        "ITUNES_PODCAST_CATEGORIES_URL",
+        "https://podcasts.apple.com/us/genre/podcasts/id26",
+    )
 
     html = get_html_content(ITUNES_PODCAST_CATEGORIES_URL)
 
     if html is None:
         return
 
-    links = get_links_from_sub_genres(html)
+    with metrics.timer("categories_parse"):
+        links = get_links_from_sub_genres(html)
+
+    metrics.add("categories_found", len(links))
 
     if links == []:
         logger.info(
@@ -78,7 +127,6 @@ def lambda_handler(event, context):
 
     clusters_of_links = get_clusters_from_links(links)
 
-    for cluster in clusters_of_links:
-        cluster_data = {"categories_urls_to_parse": cluster}
-
-        send_event_for_parsing_popular_podcasts(cluster_data)
+    send_events_for_parsing_popular_podcasts(
+        [{"categories_urls_to_parse": cluster} for cluster in clusters_of_links]
+    )
@@ -1,23 +1,46 @@
+import os
 import json
-import requests
 import logging
-from typing import List, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from pyquery import PyQuery as pq
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue
+from threading import Lock, Thread
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from sqlalchemy import case, or_
+from sqlalchemy.sql import functions
+from sqlalchemy.dialects.postgresql import insert
 
 from db.base import get_session
 import db.models as models
+import common.http_client as http_client
+import common.metrics as metrics
+import common.profiling as profiling
 
 logging.basicConfig(level=logging.NOTSET)
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Lookup API resolves many comma separated ids in a single request
+LOOKUP_BATCH_SIZE = 150
+
+PERSIST_BATCH_SIZE = 500
+
+PIPELINE_QUEUE_SIZE = 1000
+
+# Marks that the upstream stage has no more items for the next one, chart
+# links and podcasts can't be mistaken for it
+STAGE_DONE = object()
+
 
 def get_html_content(url: str) -> Optional[bytes]:
     try:
-        res = requests.get(url)
+        res = http_client.get(url)
+        res.raise_for_status()
 
         return res.content
     except Exception as e:
@@ -27,6 +50,8 @@ def get_html_content(url: str) -> Optional[bytes]:
 
 
 def get_links_from_podcasts(html: bytes) -> List[str]:
+    from pyquery import PyQuery as pq
+
     d = pq(html)
 
     a_podcasts_tags = d("#selectedcontent li a")
@@ -36,89 +61,441 @@ def get_links_from_podcasts(html: bytes) -> List[str]:
     return links
 
 
-def get_podcast_data(url: str) -> dict:
-    PODCAST_API_JSON = (
-        "https://itunes.apple.com/lookup?resultentity=PODCAST&id={id}&output=json"
+def get_podcast_id_from_link(link: str) -> str:
+    parts = link.split("?")[0].split("/")
+
+    return parts[-1].split("id")[-1]
+
+
+def get_podcasts_data(ids: List[str]) -> dict:
+    ITUNES_LOOKUP_URL = os.environ.get(
+        "ITUNES_LOOKUP_URL", "https://itunes.apple.com/lookup"
     )
-    parts = url.split("/")
-    id = parts[-1].split("id")[-1]
 
-    res = requests.get(PODCAST_API_JSON.format(id=id))
+    res = http_client.get(
+        ITUNES_LOOKUP_URL,
+        params={"entity": "podcast", "id": ",".join(ids), "output": "json"},
+    )
+    res.raise_for_status()
 
     return res.json()
 
 
 def format_data(data: dict):
-    if data["resultCount"] == 0:
-        raise Exception("No results")
-
-    data = data["results"][0]
-
     return {
-        "collection_id": data["collectionId"],
-        "track_id": data["trackId"],
+        "collection_id": str(data["collectionId"]),
+        "track_id": str(data["trackId"]),
         "feed_url": data["feedUrl"],
-        "genre_ids": data["genreIds"],
-        "genres_names": data["genres"],
+        "genre_ids": ",".join(data["genreIds"]),
+        "genre_names": ",".join(data["genres"]),
     }
 
 
-def persist_data(podcasts: List[dict]):
+def persist_data(podcasts: List[dict], looked_up_at: datetime):
+    UPDATABLE_COLUMNS = ["track_id", "feed_url", "genre_ids", "genre_names"]
+
+    # Single statement can't upsert the same collection id twice
+    podcasts_by_collection_id = {
+        podcast["collection_id"]: {
+            **podcast,
+            "status": models.PodcastStatus.Init.value,
+            "looked_up_at": looked_up_at,
+        }
+        for podcast in podcasts
+    }
+
+    if len(podcasts_by_collection_id) == 0:
+        return
+
+    podcast_table = models.Podcast.__table__
+    insert_statement = insert(podcast_table)
+
+    # Known podcasts are only looked up again once their lookup is stale, so
+    # lookup time is refreshed always and chart data when it has changed
+    upsert_statement = insert_statement.on_conflict_do_update(
+        index_elements=["collection_id"],
+        set_={
+            **{
+                column: insert_statement.excluded[column]
+                for column in UPDATABLE_COLUMNS
+            },
+            "looked_up_at": insert_statement.excluded.looked_up_at,
+            "updated_at": case(
+                (
+                    or_(
+                        *(
+                            podcast_table.c[column].is_distinct_from(
+                                insert_statement.excluded[column]
+                            )
+                            for column in UPDATABLE_COLUMNS
+                        )
+                    ),
+                    functions.now(),
+                ),
+                else_=podcast_table.c.updated_at,
+            ),
+        },
+    )
+
     session = get_session()
 
+    # Overlapping charts are saved concurrently, rows locked in the same order
+    # by every transaction can't deadlock on each other
+    rows = [
+        podcasts_by_collection_id[collection_id]
+        for collection_id in sorted(podcasts_by_collection_id)
+    ]
+
     with session.begin():
-        for podcast in podcasts:
-            session.add(
-                models.Podcast(
-                    collection_id=podcast["collection_id"],
-                    track_id=podcast["track_id"],
-                    feed_url=podcast["feed_url"],
-                    genre_ids=podcast["genre_ids"],
-                    genres_names=podcast["genres_names"],
+        session.execute(upsert_statement, rows)
+
+
+def get_recently_looked_up_ids(
+    ids: List[str], since: datetime
+) -> List[Tuple[str, datetime]]:
+    session = get_session()
+
+    with session.begin():
+        return (
+            session.query(models.Podcast.collection_id, models.Podcast.looked_up_at)
+            .filter(
+                models.Podcast.collection_id.in_(ids),
+                models.Podcast.looked_up_at > since,
+            )
+            .all()
+        )
+
+
+class LookupCache:
+    """Keeps collection ids looked up within the TTL, so they skip Lookup API.
+
+    Recently seen ids are held in an in-process LRU, which outlives a single
+    invocation on a warm container, and the rest are checked in the podcast
+    table, where the time of the last lookup is stored.
+    """
+
+    def __init__(self, ttl: timedelta, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = Lock()
+        self.looked_up_at_by_id = OrderedDict()
+
+    def add(self, looked_up_ids: Iterable[Tuple[str, datetime]]):
+        with self.lock:
+            for id, looked_up_at in looked_up_ids:
+                self.looked_up_at_by_id[id] = looked_up_at
+                self.looked_up_at_by_id.move_to_end(id)
+
+            while len(self.looked_up_at_by_id) > self.max_size:
+                self.looked_up_at_by_id.popitem(last=False)
+
+    def get_stale_ids(self, ids: List[str]) -> List[str]:
+        since = datetime.now(timezone.utc) - self.ttl
+        unknown_ids = []
+
+        with self.lock:
+            for id in ids:
+                looked_up_at = self.looked_up_at_by_id.get(id)
+
+                if looked_up_at is not None and looked_up_at > since:
+                    self.looked_up_at_by_id.move_to_end(id)
+                else:
+                    unknown_ids.append(id)
+
+        if len(unknown_ids) == 0:
+            return []
+
+        try:
+            looked_up_ids = get_recently_looked_up_ids(unknown_ids, since)
+        except Exception as e:
+            logger.error(f"Failed to get recently looked up podcasts. Cause: {e}")
+            return unknown_ids
+
+        self.add(looked_up_ids)
+
+        fresh_ids = {id for id, _ in looked_up_ids}
+
+        return [id for id in unknown_ids if id not in fresh_ids]
+
+
+@lru_cache(maxsize=None)
+def get_lookup_cache() -> LookupCache:
+    return LookupCache(
+        ttl=timedelta(hours=float(os.environ.get("LOOKUP_TTL_HOURS", "168"))),
+        max_size=int(os.environ.get("LOOKUP_CACHE_SIZE", "50000")),
+    )
+
+
+def lookup_podcasts(links_by_id: Dict[str, str]) -> List[dict]:
+    data = get_podcasts_data(list(links_by_id))
+
+    results_by_id = {
+        str(result["collectionId"]): result
+        for result in data["results"]
+        if "collectionId" in result
+    }
+
+    podcasts = []
+
+    for id, link in links_by_id.items():
+        try:
+            podcasts.append(format_data(results_by_id[id]))
+        except Exception as e:
+            logger.error(f"Failed to retrieve data for link: {link}. Cause: {e}")
+
+    return podcasts
+
+
+def fetch_categories_stage(
+    urls: List[str], executor: ThreadPoolExecutor, links_queue: Queue, errors: list
+):
+    def fetch_category(url: str):
+        with metrics.timer("category_fetch"):
+            html = get_html_content(url)
+
+        if html is None:
+            errors.append(f"Category: {url} was not fetched.")
+            return
+
+        with metrics.timer("category_parse"):
+            links = get_links_from_podcasts(html)
+
+        # Chart entries without a href have no podcast to look up
+        links = [link for link in links if link]
+
+        metrics.add("podcast_links", len(links))
+
+        for link in links:
+            links_queue.put(link)
+
+    try:
+        future_to_url = {executor.submit(fetch_category, url): url for url in urls}
+
+        for future in as_completed(future_to_url):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(
+                    f"Failed to parse category: {future_to_url[future]}. Cause: {e}"
                 )
+                errors.append(f"Category: {future_to_url[future]} was not parsed.")
+    except Exception as e:
+        logger.error(f"Fetching categories stopped. Cause: {e}")
+        errors.append("Fetching categories stopped.")
+    finally:
+        links_queue.put(STAGE_DONE)
+
+
+def drain(queue: Queue):
+    """Consumes a failed stage's input, so the upstream stage isn't blocked."""
+    while queue.get() is not STAGE_DONE:
+        pass
+
+
+def lookup_podcasts_stage(
+    links_queue: Queue,
+    executor: ThreadPoolExecutor,
+    podcasts_queue: Queue,
+    errors: list,
+):
+    def lookup_batch(links_by_id: Dict[str, str]):
+        try:
+            with metrics.timer("lookup"):
+                podcasts = lookup_podcasts(links_by_id)
+
+            metrics.add("lookup_requests")
+            metrics.add("podcasts_looked_up", len(podcasts))
+
+            for podcast in podcasts:
+                podcasts_queue.put(podcast)
+        except Exception as e:
+            logger.error(
+                f"Failed to retrieve data for ids: {list(links_by_id)}. Cause: {e}"
             )
+            errors.append(f"Lookup of {len(links_by_id)} podcasts failed.")
+
+    # Charts of different categories overlap, so ids are deduped before lookup
+    seen_ids = set()
+    candidates = {}
+    batch = {}
+    futures = []
+    link = None
+
+    def add_stale_to_batch(candidates: Dict[str, str]):
+        nonlocal batch
+
+        # Ids looked up within the TTL are skipped, the rest still fill up
+        # complete batches for the Lookup API
+        stale_ids = lookup_cache.get_stale_ids(list(candidates))
+
+        metrics.add("lookup_cache_hits", len(candidates) - len(stale_ids))
+
+        for id in stale_ids:
+            batch[id] = candidates[id]
+
+            if len(batch) == LOOKUP_BATCH_SIZE:
+                futures.append(executor.submit(lookup_batch, batch))
+                batch = {}
+
+    try:
+        lookup_cache = get_lookup_cache()
+
+        while True:
+            link = links_queue.get()
+
+            if link is STAGE_DONE:
+                break
+
+            id = get_podcast_id_from_link(link)
+
+            if id in seen_ids:
+                continue
+
+            seen_ids.add(id)
+            candidates[id] = link
+
+            if len(candidates) == LOOKUP_BATCH_SIZE:
+                add_stale_to_batch(candidates)
+                candidates = {}
+
+        if len(candidates) > 0:
+            add_stale_to_batch(candidates)
+
+        if len(batch) > 0:
+            futures.append(executor.submit(lookup_batch, batch))
+    except Exception as e:
+        logger.error(f"Looking up podcasts stopped. Cause: {e}")
+        errors.append("Looking up podcasts stopped.")
+
+        if link is not STAGE_DONE:
+            drain(links_queue)
+    finally:
+        wait(futures)
+        podcasts_queue.put(STAGE_DONE)
+
+
+def persist_podcasts_stage(podcasts_queue: Queue, errors: list):
+    def persist_batch(podcasts: List[dict]):
+        looked_up_at = datetime.now(timezone.utc)
+
+        try:
+            with metrics.timer("persist"):
+                persist_data(podcasts, looked_up_at)
+
+            metrics.add("podcasts_persisted", len(podcasts))
+            lookup_cache.add(
+                (podcast["collection_id"], looked_up_at) for podcast in podcasts
+            )
+        except Exception as e:
+            logger.error(f"Failed to save {len(podcasts)} podcasts. Cause: {e}")
+            errors.append(f"Saving of {len(podcasts)} podcasts failed.")
+
+    batch = []
+    podcast = None
+
+    try:
+        lookup_cache = get_lookup_cache()
+
+        while True:
+            podcast = podcasts_queue.get()
+
+            if podcast is STAGE_DONE:
+                break
+
+            batch.append(podcast)
+
+            if len(batch) == PERSIST_BATCH_SIZE:
+                persist_batch(batch)
+                batch = []
+
+        if len(batch) > 0:
+            persist_batch(batch)
+    except Exception as e:
+        logger.error(f"Saving podcasts stopped. Cause: {e}")
+        errors.append("Saving podcasts stopped.")
+
+        if podcast is not STAGE_DONE:
+            drain(podcasts_queue)
 
 
 def process_message(message: dict):
+    """Runs category fetching, lookups and persisting as concurrent stages.
+
+    Stages are connected with bounded queues, so lookups start as soon as the
+    first category page is parsed and podcasts are saved while other
+    categories are still being fetched. Failures don't stop the other stages,
+    they are raised once the message is done, so the message is retried.
+    """
     NUMBER_OF_WORKERS = 10
     urls_to_scrape = message["categories_urls_to_parse"]
 
-    data_to_save = []
+    links_queue = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    podcasts_queue = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    errors = []
 
-    with ThreadPoolExecutor(max_workers=NUMBER_OF_WORKERS) as executor:
-        for url in urls_to_scrape:
-            html = get_html_content(url)
+    with ThreadPoolExecutor(
+        max_workers=len(urls_to_scrape) or 1
+    ) as fetch_executor, ThreadPoolExecutor(
+        max_workers=NUMBER_OF_WORKERS
+    ) as lookup_executor:
+        stages = [
+            Thread(
+                target=fetch_categories_stage,
+                args=(urls_to_scrape, fetch_executor, links_queue, errors),
+            ),
+            Thread(
+                target=lookup_podcasts_stage,
+                args=(links_queue, lookup_executor, podcasts_queue, errors),
+            ),
+            Thread(target=persist_podcasts_stage, args=(podcasts_queue, errors)),
+        ]
 
-            links = get_links_from_podcasts(html)
+        for stage in stages:
+            stage.start()
+
+        for stage in stages:
+            stage.join()
 
-            future_to_link = {
-                executor.submit(get_podcast_data, link): link for link in links
-            }
+    if len(errors) > 0:
+        raise RuntimeError(f"Message was processed partially. Errors: {errors}")
 
-            data_to_save = []
 
-            for future in as_completed(future_to_link):
-                link = future_to_link[future]
+def process_record(record: dict):
+    body = json.loads(record["body"])
 
-                try:
-                    data = future.result()
+    # Category parser sends messages straight to the queue, while messages
+    # fanned out through SNS carry them in an envelope
+    message = json.loads(body["Message"]) if "Message" in body else body
 
-                    data_to_save.append(format_data(data))
+    process_message(message)
 
-                except Exception as e:
-                    logger.error(
-                        f"Failed to retrieve data for link: {link}. Cause: {e}"
-                    )
+
+@profiling.profile("itunes_popular_podcast_parser")
+@metrics.instrument("itunes_popular_podcast_parser")
+def lambda_handler(event, context):
+    NUMBER_OF_RECORD_WORKERS = 4
+    records = event["Records"]
+    batch_item_failures = []
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(records), NUMBER_OF_RECORD_WORKERS) or 1
+    ) as executor:
+        future_to_record = {
+            executor.submit(process_record, record): record for record in records
+        }
+
+        for future in as_completed(future_to_record):
+            message_id = future_to_record[future]["messageId"]
 
             try:
-                persist_data(data_to_save)
+                future.result()
             except Exception as e:
-                logger.error(f"Failed to save data for category: {url}. Cause: {e}")
-
+                logger.error(f"Failed to process message: {message_id}. Cause: {e}")
+                batch_item_failures.append({"itemIdentifier": message_id})
 
-def lambda_handler(event, context):
-    for record in event["Records"]:
-        body = json.loads(record["body"])
-        message = json.loads(body["Message"])
+    metrics.add("records", len(records))
+    metrics.add("failed_records", len(batch_item_failures))
 
-        process_message(message)
+    # Event source reports batch item failures, so only the failed messages
+    # become visible in the queue again instead of the whole batch
+    return {"batchItemFailures": batch_item_failures}
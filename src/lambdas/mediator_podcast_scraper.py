@@ -1,13 +1,18 @@
 import os
 import json
 import logging
-from datetime import datetime, timezone, timedelta
-import boto3
+from datetime import timedelta
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
 
-from sqlalchemy import and_
+from sqlalchemy import select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import functions
 
 from db.base import get_session
 import db.models as models
+import common.metrics as metrics
+import common.profiling as profiling
 
 
 logging.basicConfig(level=logging.NOTSET)
@@ -15,110 +20,183 @@ logging.basicConfig(level=logging.NOTSET)
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Container overrides of a task are limited to 8 KiB in total, the rest of it
+# is left for the names and the other fields of the override
+MAX_PAYLOAD_BYTES = 7 * 1024
 
-def get_podcasts_to_scrape(number_of_podcasts_to_scrap: int):
-    session = get_session()
 
-    # Podcasts that are not yet scrapped with episodes
-    podcasts = (
-        session.query(models.Podcast)
-        .filter(models.Podcast.status == models.PodcastStatus.Init.value)
-        .order_by(models.Podcast.updated_at)
-        .limit(number_of_podcasts_to_scrap)
-        .all()
+def get_podcasts_to_scrape(number_of_podcasts_to_scrap: int) -> List[Row]:
+    """Claims due podcasts by leasing them for the duration of a scrape.
+
+    Due rows are locked with SKIP LOCKED and their next check is pushed past
+    the lease, so parallel mediators never pick the same podcast. If a task
+    dies before rescheduling the podcast, it becomes due again once the lease
+    expires.
+    """
+    if number_of_podcasts_to_scrap <= 0:
+        return []
+
+    lease_duration = timedelta(
+        minutes=int(os.environ.get("PODCAST_LEASE_MINUTES", "30"))
     )
 
-    if len(podcasts) < number_of_podcasts_to_scrap:
-        # Taking podcasts with status 'Active' which means they already been scrapped,
-        # but they should be checked and updated if needed.
-        # Time that must passed before next check is one day.
-        current_utc_datetime = datetime.now(timezone.utc) - timedelta(days=1)
-
-        podcasts += (
-            session.query(models.Podcast)
-            .filter(
-                and_(
-                    models.Podcast.status == models.PodcastStatus.Active.value,
-                    models.Podcast.update_at <= current_utc_datetime.date(),
-                )
-            )
-            .order_by(models.Podcast.updated_at)
-            .limit(number_of_podcasts_to_scrap - len(podcasts))
-            .all()
+    # New podcasts are due as soon as they are inserted, already scrapped ones
+    # are due once the interval derived from their publishing frequency passes
+    due_podcasts = (
+        select(models.Podcast.id)
+        .where(
+            models.Podcast.status != models.PodcastStatus.Inactive.value,
+            models.Podcast.next_check_at <= functions.now(),
         )
+        .order_by(models.Podcast.next_check_at)
+        .limit(number_of_podcasts_to_scrap)
+        .with_for_update(skip_locked=True)
+    )
+
+    claim_statement = (
+        update(models.Podcast)
+        .where(models.Podcast.id.in_(due_podcasts))
+        .values(next_check_at=functions.now() + lease_duration)
+        .returning(models.Podcast.id, models.Podcast.feed_url)
+        .execution_options(synchronize_session=False)
+    )
+
+    session = get_session()
+
+    with session.begin():
+        return session.execute(claim_statement).all()
 
 
-def format_payload(podcast: models.Podcast):
-    payload = {"id": podcast.id, "feed_url": podcast.feed_url}
+def format_payload(podcasts: List[Row]) -> str:
+    payload = [
+        {"id": str(podcast.id), "feed_url": podcast.feed_url} for podcast in podcasts
+    ]
 
     return json.dumps(payload)
 
 
-def run_task(podcast):
-    client = boto3.client("ecs")
-
-    response = client.run_task(
-        cluster=os.environ.get("ECS_CLUSTER"),
-        launchType="FARGATE",
-        taskDefinition=os.environ.get("ECS_TASK_DEFINITION"),
-        count=1,
-        platformVersion="LATEST",
-        networkConfiguration={
-            "awsvpcConfiguration": {
-                "subnets": [
-                    os.environ.get("ECS_TASK_SUBNET_1"),
-                ],
-                "assignPublicIp": "ENABLED",
-                "securityGroups": [os.environ.get("SECURITY_GROUP")],
-            }
-        },
-        overrides={
-            "containerOverrides": [
-                {
-                    "name": "PodcastScraperTask",
-                    "environment": [
-                        {"name": "PODCAST_TO_SCRAPE", "value": format_payload(podcast)},
+def get_batches(podcasts: List[Row], max_podcasts: int) -> List[List[Row]]:
+    """Packs podcasts into task payloads that fit the container override limit.
+
+    Feed urls are up to 500 characters long, so a batch is closed once the
+    next podcast would make its payload too large, even if it has fewer than
+    `max_podcasts` podcasts.
+    """
+    batches = []
+    batch = []
+
+    for podcast in podcasts:
+        too_large = len(format_payload(batch + [podcast]).encode()) > MAX_PAYLOAD_BYTES
+
+        if len(batch) > 0 and (len(batch) == max_podcasts or too_large):
+            batches.append(batch)
+            batch = []
+
+        batch.append(podcast)
+
+    if len(batch) > 0:
+        batches.append(batch)
+
+    return batches
+
+
+def get_ecs_client():
+    import boto3
+
+    return boto3.client("ecs")
+
+
+def run_task(client, podcasts: List[Row]):
+    try:
+        response = client.run_task(
+            cluster=os.environ.get("ECS_CLUSTER"),
+            launchType="FARGATE",
+            taskDefinition=os.environ.get("ECS_TASK_DEFINITION"),
+            count=1,
+            platformVersion="LATEST",
+            networkConfiguration={
+                "awsvpcConfiguration": {
+                    "subnets": [
+                        os.environ.get("ECS_TASK_SUBNET_1"),
                     ],
-                },
-            ]
-        },
-    )
+                    "assignPublicIp": "ENABLED",
+                    "securityGroups": [os.environ.get("SECURITY_GROUP")],
+                }
+            },
+            overrides={
+                "containerOverrides": [
+                    {
+                        "name": "PodcastScraperContainer",
+                        "environment": [
+                            {
+                                "name": "PODCASTS_TO_SCRAPE",
+                                "value": format_payload(podcasts),
+                            },
+                        ],
+                    },
+                ]
+            },
+        )
+    except Exception as e:
+        metrics.add("task_launch_failures")
+        logger.error(f"Failed spawning ecs task. Cause: {e}")
+        return
 
     failures = response["failures"]
 
     if len(failures) > 0:
+        metrics.add("task_launch_failures")
         logger.error(f"Failed spawning ecs task, errors: {failures}")
+        return
 
+    metrics.add("tasks_launched")
 
-def get_current_number_of_running_tasks() -> int:
-    client = boto3.client("ecs")
 
+def get_current_number_of_running_tasks(client) -> int:
     try:
-        response = client.list_tasks(
+        pages = client.get_paginator("list_tasks").paginate(
             cluster=os.environ.get("ECS_CLUSTER"), launchType="FARGATE"
         )
 
-        return int(len(response["taskArns"]))
+        return sum(len(page["taskArns"]) for page in pages)
     except Exception as e:
         logger.error(f"Couldn't retrieve number of running tasks. Cause: {e}")
         return int(os.environ.get("NUMBER_OF_PARALLEL_TASKS"))
 
 
+@profiling.profile("mediator_podcast_scraper")
+@metrics.instrument("mediator_podcast_scraper")
 def lambda_handler(event, context):
+    NUMBER_OF_LAUNCH_WORKERS = 10
+
     number_of_parallel_tasks_for_scraping = int(
         os.environ.get("NUMBER_OF_PARALLEL_TASKS")
     )
+    number_of_podcasts_per_task = int(os.environ.get("PODCASTS_PER_TASK", "25"))
 
-    current_number_of_running_tasks = get_current_number_of_running_tasks()
+    client = get_ecs_client()
+
+    with metrics.timer("running_tasks_count"):
+        current_number_of_running_tasks = get_current_number_of_running_tasks(client)
 
     # Idea is to always to run defined set of tasks and not to overwhelm system
-    podcasts = get_podcasts_to_scrape(
-        number_of_parallel_tasks_for_scraping - current_number_of_running_tasks
-    )
+    with metrics.timer("podcasts_claim"):
+        podcasts = get_podcasts_to_scrape(
+            (number_of_parallel_tasks_for_scraping - current_number_of_running_tasks)
+            * number_of_podcasts_per_task
+        )
+
+    metrics.add("podcasts_claimed", len(podcasts))
 
     if len(podcasts) == 0:
         logger.info("No podcasts that should be scrapped at the moment.")
         return
 
-    for podcast in podcasts:
-        run_task(podcast)
+    # Batches of long feed urls hold fewer podcasts, all of them are launched
+    # as the podcasts are leased already and running tasks are counted again
+    # on the next run
+    batches = get_batches(podcasts, number_of_podcasts_per_task)
+
+    with ThreadPoolExecutor(max_workers=NUMBER_OF_LAUNCH_WORKERS) as executor:
+        for batch in batches:
+            executor.submit(run_task, client, batch)
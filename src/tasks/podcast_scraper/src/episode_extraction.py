@@ -0,0 +1,114 @@
+import logging
+from typing import Dict, Optional, NamedTuple
+from datetime import datetime
+
+import db.models as models
+from pub_date import parse_pub_date
+
+logger = logging.getLogger()
+
+episode_columns = models.PodcastEpisode.__table__.c
+
+
+class Episode(NamedTuple):
+    title: Optional[str]
+    link: Optional[str]
+    published_date: Optional[datetime]
+    external_id: str
+    episode_number: Optional[int]
+    episode_duration: Optional[str]
+
+
+# Positions of the raw values collected from an item's children
+TITLE, LINK, PUBLISHED_DATE, GUID, ENCLOSURE_URL, EPISODE_NUMBER, DURATION = range(7)
+
+# Fields of the item itself, namespaced elements like itunes:title don't count
+UNQUALIFIED_FIELDS = {
+    "title": TITLE,
+    "link": LINK,
+    "pubDate": PUBLISHED_DATE,
+    "guid": GUID,
+    "enclosure": ENCLOSURE_URL,
+}
+
+# Fields taken from an element of that local name in any namespace (itunes:*)
+ANY_NAMESPACE_FIELDS = {"episode": EPISODE_NUMBER, "duration": DURATION}
+
+
+def truncate(value: Optional[str], column) -> Optional[str]:
+    return value[: column.type.length] if value is not None else None
+
+
+def get_episode_number(value: Optional[str]) -> Optional[int]:
+    value = value.strip() if value is not None else ""
+
+    return int(value) if value.isdigit() else None
+
+
+class EpisodeExtractor:
+    """Extraction plan that turns feed items into Episode records.
+
+    Each item's children are visited once and dispatched through a table from
+    element tag to field, instead of searching the item once per field. The
+    table is compiled for every tag the first time it is seen, so it is built
+    once per namespace map and reused for all items of all feeds.
+    """
+
+    def __init__(self):
+        self.fields_by_tag: Dict[object, Optional[int]] = {}
+
+    def compile_tag(self, tag) -> Optional[int]:
+        field = None
+
+        # Comments and processing instructions have callables as tags
+        if isinstance(tag, str):
+            namespace, _, local_name = tag.rpartition("}")
+
+            if namespace:
+                field = ANY_NAMESPACE_FIELDS.get(local_name)
+            else:
+                field = UNQUALIFIED_FIELDS.get(tag, ANY_NAMESPACE_FIELDS.get(tag))
+
+        self.fields_by_tag[tag] = field
+
+        return field
+
+    def extract(self, item) -> Optional[Episode]:
+        """Extracts a single item, a broken item is skipped instead of the feed."""
+        try:
+            values = [None] * 7
+
+            for child in item:
+                try:
+                    field = self.fields_by_tag[child.tag]
+                except KeyError:
+                    field = self.compile_tag(child.tag)
+
+                if field is None or values[field] is not None:
+                    continue
+
+                values[field] = (
+                    child.get("url") if field == ENCLOSURE_URL else child.text
+                )
+
+            # Items without guid are identified the same way podcast apps do
+            external_id = values[GUID] or values[ENCLOSURE_URL] or values[LINK]
+
+            if external_id is None:
+                logger.warning("Skipping feed item without guid, enclosure or link.")
+                return None
+
+            return Episode(
+                truncate(values[TITLE], episode_columns.title),
+                truncate(values[LINK], episode_columns.link),
+                parse_pub_date(values[PUBLISHED_DATE]),
+                truncate(external_id, episode_columns.external_id),
+                get_episode_number(values[EPISODE_NUMBER]),
+                truncate(values[DURATION], episode_columns.episode_duration),
+            )
+        except Exception as e:
+            logger.warning(f"Skipping feed item that couldn't be extracted. Cause: {e}")
+            return None
+
+
+episode_extractor = EpisodeExtractor()
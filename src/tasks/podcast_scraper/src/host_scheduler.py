@@ -0,0 +1,82 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+
+def get_host(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostScheduler:
+    """Limits request rate and number of concurrent fetches per feed host."""
+
+    def __init__(
+        self, requests_per_second: float, burst: int, max_connections_per_host: int
+    ):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_connections_per_host = max_connections_per_host
+        self._hosts: Dict[str, Tuple[asyncio.Semaphore, TokenBucket]] = {}
+
+    def _get_host_limits(self, host: str) -> Tuple[asyncio.Semaphore, TokenBucket]:
+        if host not in self._hosts:
+            self._hosts[host] = (
+                asyncio.Semaphore(self.max_connections_per_host),
+                TokenBucket(self.requests_per_second, self.burst),
+            )
+
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        semaphore, bucket = self._get_host_limits(get_host(url))
+
+        async with semaphore:
+            await bucket.acquire()
+
+            yield
+
+
+def interleave_by_host(podcasts: List[dict]) -> List[dict]:
+    """Orders podcasts round robin across feed hosts.
+
+    Feeds of one big host would otherwise sit next to each other and queue up
+    on that host's limits while other hosts are idle.
+    """
+    podcasts_by_host = OrderedDict()
+
+    for podcast in podcasts:
+        podcasts_by_host.setdefault(get_host(podcast["feed_url"]), []).append(podcast)
+
+    queues = list(podcasts_by_host.values())
+    interleaved = []
+
+    for i in range(max((len(queue) for queue in queues), default=0)):
+        interleaved += [queue[i] for queue in queues if i < len(queue)]
+
+    return interleaved
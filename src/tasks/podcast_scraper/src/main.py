@@ -1,12 +1,32 @@
 import os
 import logging
 import json
+import hashlib
+import time
+import uuid
+from io import BytesIO
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from lxml import etree
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import requests
-from typing import List, Optional
-from db.models import models
-from db.base import get_session
+from typing import Iterable, List, Optional, NamedTuple, Set, Tuple
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import functions
+from sqlalchemy.dialects.postgresql import insert
+import db.models as models
+from db.base import get_engine, get_session
+import common.http_client as http_client
+import common.metrics as metrics
+import common.profiling as profiling
+from host_scheduler import HostScheduler, interleave_by_host
+from pub_date import parse_pub_date
+from episode_extraction import Episode, episode_extractor
+from refresh_interval import (
+    FAILED_CHECK_RETRY_INTERVAL,
+    get_check_interval_from_summary,
+)
 
 from dotenv import load_dotenv
 
@@ -18,120 +38,682 @@ logger.setLevel(logging.INFO)
 
 load_dotenv()
 
+FEED_CHUNK_SIZE = 64 * 1024
 
-def update_podcast(id, data):
+# Feeds are ordered newest first, so only the latest stored episodes are needed
+# to recognise where the already scraped part of the feed starts
+KNOWN_EPISODES_WINDOW = 100
+
+EPISODES_INSERT_BATCH_SIZE = 500
+
+# First scrapes of big catalogues are loaded with COPY in chunks, each chunk
+# merged and committed on its own
+EPISODES_COPY_THRESHOLD = 500
+EPISODES_COPY_CHUNK_SIZE = 5000
+
+EPISODE_COPY_COLUMNS = ("id", "podcast_id", "status") + Episode._fields
+
+# Number of leading items that, together with the channel header, make up the
+# content digest of feeds whose hosts don't send validators
+CONTENT_DIGEST_ITEMS = 10
+
+
+class FeedResponse(NamedTuple):
+    response: Optional[requests.Response]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    not_modified: bool = False
+
+
+class PodcastCheck(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_digest: Optional[str]
+    stats: Optional[Row]
+
+
+class FetchedFeed(NamedTuple):
+    feed_response: Optional[FeedResponse]
+    podcast_data: Optional[dict] = None
+    episodes_data: List[Episode] = []
+
+
+def get_feed_validators(id) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     session = get_session()
 
-    podcast = session.query(models.Podcast).filter(models.Podcast.id == id).first()
+    with session.begin():
+        return (
+            session.query(
+                models.Podcast.etag,
+                models.Podcast.last_modified,
+                models.Podcast.content_digest,
+            )
+            .filter(models.Podcast.id == id)
+            .one()
+        )
+
+
+def mark_podcast_checked(id, check_interval: timedelta):
+    session = get_session()
+
+    with session.begin():
+        session.query(models.Podcast).filter(models.Podcast.id == id).update(
+            {
+                models.Podcast.last_checked_at: functions.now(),
+                models.Podcast.next_check_at: functions.now() + check_interval,
+            },
+            synchronize_session=False,
+        )
+
 
-    if podcast.status != models.PodcastStatus.Active.value:
-        with session.begin():
+def update_podcast(id, data, feed_response: FeedResponse, check_interval: timedelta):
+    session = get_session()
+
+    with session.begin():
+        podcast = session.query(models.Podcast).filter(models.Podcast.id == id).first()
+
+        if podcast.status != models.PodcastStatus.Active.value:
             podcast.name = data["name"]
             podcast.published_date = data["published_date"]
+            podcast.status = models.PodcastStatus.Active.value
+
+        # Validators are stored on every fetch so the next check can be conditional
+        podcast.etag = feed_response.etag
+        podcast.last_modified = feed_response.last_modified
+        podcast.content_digest = data["content_digest"]
+        podcast.last_checked_at = functions.now()
+        podcast.next_check_at = functions.now() + check_interval
 
-            session.add(podcast)
+        session.add(podcast)
 
 
-def create_new_episodes(podcast_id: str, episodes_data: List[dict]):
+def get_podcast_stats(podcast_id: str) -> Optional[Row]:
     session = get_session()
 
-    existing_episodes = (
-        session.query(models.PodcastEpisode)
-        .filter(models.PodcastEpisode.podcast_id == podcast_id)
-        .all()
+    with session.begin():
+        return (
+            session.query(
+                models.PodcastStats.episode_count,
+                models.PodcastStats.latest_published_date,
+                models.PodcastStats.average_publishing_interval,
+            )
+            .filter(models.PodcastStats.podcast_id == podcast_id)
+            .one_or_none()
+        )
+
+
+def get_next_check_interval(stats: Optional[Row]) -> timedelta:
+    if stats is None:
+        return get_check_interval_from_summary(None, None, datetime.now(timezone.utc))
+
+    return get_check_interval_from_summary(
+        stats.latest_published_date,
+        stats.average_publishing_interval,
+        datetime.now(timezone.utc),
+    )
+
+
+def get_episodes_summary(inserted_episodes: List[Row]) -> dict:
+    dated_episodes = [
+        episode for episode in inserted_episodes if episode.published_date is not None
+    ]
+    summary = {
+        "episode_count": len(inserted_episodes),
+        "dated_episode_count": len(dated_episodes),
+        "earliest_published_date": None,
+        "latest_published_date": None,
+        "latest_external_id": None,
+        "average_publishing_interval": None,
+    }
+
+    if len(dated_episodes) > 0:
+        earliest = min(dated_episodes, key=lambda episode: episode.published_date)
+        latest = max(dated_episodes, key=lambda episode: episode.published_date)
+
+        summary["earliest_published_date"] = earliest.published_date
+        summary["latest_published_date"] = latest.published_date
+        summary["latest_external_id"] = latest.external_id
+
+    if len(dated_episodes) > 1:
+        summary["average_publishing_interval"] = (
+            summary["latest_published_date"] - summary["earliest_published_date"]
+        ) / (len(dated_episodes) - 1)
+
+    return summary
+
+
+def update_podcast_stats(connection, podcast_id: str, inserted_episodes: List[Row]):
+    """Adds just inserted episodes to podcast's stats.
+
+    Runs in the transaction that inserted the episodes, with rows returned by
+    that insert, so episodes skipped as duplicates are never counted.
+    """
+    if len(inserted_episodes) == 0:
+        return
+
+    stats_table = models.PodcastStats.__table__
+    insert_statement = insert(stats_table).values(
+        podcast_id=podcast_id, **get_episodes_summary(inserted_episodes)
+    )
+
+    current = stats_table.c
+    excluded = insert_statement.excluded
+    dated_episode_count = current.dated_episode_count + excluded.dated_episode_count
+    earliest = func.least(
+        current.earliest_published_date, excluded.earliest_published_date
+    )
+    latest = func.greatest(
+        current.latest_published_date, excluded.latest_published_date
+    )
+
+    upsert_statement = insert_statement.on_conflict_do_update(
+        index_elements=["podcast_id"],
+        set_={
+            "episode_count": current.episode_count + excluded.episode_count,
+            "dated_episode_count": dated_episode_count,
+            "earliest_published_date": earliest,
+            "latest_published_date": latest,
+            "latest_external_id": case(
+                (
+                    or_(
+                        current.latest_published_date.is_(None),
+                        excluded.latest_published_date >= current.latest_published_date,
+                    ),
+                    excluded.latest_external_id,
+                ),
+                else_=current.latest_external_id,
+            ),
+            "average_publishing_interval": (latest - earliest)
+            / func.nullif(dated_episode_count - 1, 0),
+            "updated_at": functions.now(),
+        },
     )
 
-    episodes_external_ids = [episode.external_id for episode in existing_episodes]
+    connection.execute(upsert_statement)
 
+
+def get_known_episode_ids(podcast_id: str) -> Set[str]:
+    session = get_session()
+    rows = []
+
+    # Dormant podcasts can have all of their episodes archived, the latest
+    # archived ones still stop parsing once the feed changes again
     with session.begin():
-        for episode in episodes_data:
-            if episode["external_id"] not in episodes_external_ids:
-                session.add(
-                    models.PodcastEpisode(
-                        title=episode["title"],
-                        link=episode["link"],
-                        published_date=episode["published_date"],
-                        external_id=episode["external_id"],
-                        episode_number=episode["episode_number"],
-                        episode_duration=episode["episode_duration"],
-                        podcast_id=podcast_id,
-                    )
+        for model in (models.PodcastEpisode, models.PodcastEpisodeArchive):
+            rows += (
+                session.query(model.external_id)
+                .filter(model.podcast_id == podcast_id)
+                .order_by(model.published_date.desc().nullslast())
+                .limit(KNOWN_EPISODES_WINDOW)
+                .all()
+            )
+
+    return {row.external_id for row in rows}
+
+
+def get_archived_episode_ids(podcast_id: str, external_ids: List[str]) -> Set[str]:
+    session = get_session()
+
+    with session.begin():
+        rows = (
+            session.query(models.PodcastEpisodeArchive.external_id)
+            .filter(
+                models.PodcastEpisodeArchive.podcast_id == podcast_id,
+                models.PodcastEpisodeArchive.external_id.in_(external_ids),
+            )
+            .all()
+        )
+
+    return {row.external_id for row in rows}
+
+
+def insert_new_episodes(podcast_id: str, episodes_data: List[Episode]):
+    session = get_session()
+    episode_table = models.PodcastEpisode.__table__
+    inserted_episodes = []
+
+    with session.begin():
+        for i in range(0, len(episodes_data), EPISODES_INSERT_BATCH_SIZE):
+            # Episodes that are already stored are skipped by the unique
+            # (podcast_id, external_id) index, which also keeps concurrent
+            # scrapes safe, and only the inserted ones are returned
+            insert_statement = (
+                insert(episode_table)
+                .values(
+                    [
+                        {
+                            **episode._asdict(),
+                            "podcast_id": podcast_id,
+                            "status": models.PodcastEpisodeStatus.Active.value,
+                        }
+                        for episode in episodes_data[i : i + EPISODES_INSERT_BATCH_SIZE]
+                    ]
                 )
+                .on_conflict_do_nothing(index_elements=["podcast_id", "external_id"])
+                .returning(episode_table.c.published_date, episode_table.c.external_id)
+            )
+
+            inserted_episodes += session.execute(insert_statement).fetchall()
+
+        update_podcast_stats(session, podcast_id, inserted_episodes)
+
+
+def to_copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_new_episodes(podcast_id: str, episodes_data: List[Episode]):
+    """Bulk loads episodes through a staging table filled with COPY.
+
+    Chunks are merged oldest first, so if loading fails midway, the newest
+    episodes are the ones missing and the next scrape doesn't stop before them.
+    """
+    columns = ", ".join(EPISODE_COPY_COLUMNS)
+    status = models.PodcastEpisodeStatus.Active.value
+
+    merge_statement = text(
+        f"INSERT INTO podcast_episode ({columns}) "
+        f"SELECT {columns} FROM podcast_episode_staging "
+        "ON CONFLICT (podcast_id, external_id) DO NOTHING "
+        "RETURNING published_date, external_id"
+    )
+
+    oldest_first = episodes_data[::-1]
+
+    with get_engine().connect() as connection:
+        for i in range(0, len(oldest_first), EPISODES_COPY_CHUNK_SIZE):
+            rows = "".join(
+                "\t".join(
+                    map(to_copy_value, (uuid.uuid4(), podcast_id, status, *episode))
+                )
+                + "\n"
+                for episode in oldest_first[i : i + EPISODES_COPY_CHUNK_SIZE]
+            )
+
+            with connection.begin():
+                cursor = connection.connection.cursor()
+
+                # Staging table lives as long as the pooled connection and
+                # every commit empties it
+                cursor.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS podcast_episode_staging "
+                    "(LIKE podcast_episode INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                )
+
+                # Rows are sent as UTF-8 bytes, whatever the client encoding is
+                cursor.copy_expert(
+                    f"COPY podcast_episode_staging ({columns}) FROM STDIN "
+                    "WITH (ENCODING 'UTF8')",
+                    BytesIO(rows.encode()),
+                )
+
+                inserted_episodes = connection.execute(merge_statement).fetchall()
+
+                update_podcast_stats(connection, podcast_id, inserted_episodes)
 
 
-def get_datetime(str: str) -> datetime:
-    PUBLISHED_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S %z"
+def create_new_episodes(podcast_id: str, episodes_data: List[Episode]):
+    if len(episodes_data) == 0:
+        return
+
+    # Unique index only covers episodes that aren't archived, without this a
+    # changed feed of a dormant podcast would bring its whole archive back
+    archived_ids = get_archived_episode_ids(
+        podcast_id, [episode.external_id for episode in episodes_data]
+    )
+    episodes_data = [
+        episode for episode in episodes_data if episode.external_id not in archived_ids
+    ]
+
+    if len(episodes_data) > EPISODES_COPY_THRESHOLD:
+        copy_new_episodes(podcast_id, episodes_data)
+    else:
+        insert_new_episodes(podcast_id, episodes_data)
+
+
+class FeedDownload:
+    """Iterates over feed chunks, keeping the time spent waiting on them."""
+
+    def __init__(self, response: requests.Response):
+        self.chunks = response.iter_content(FEED_CHUNK_SIZE)
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        started_at = time.perf_counter()
+
+        try:
+            chunk = next(self.chunks)
+        finally:
+            self.seconds += time.perf_counter() - started_at
+
+        self.bytes += len(chunk)
 
-    return datetime.strptime(str, PUBLISHED_DATE_FORMAT)
+        return chunk
 
 
-def get_xml_content(url: str) -> Optional[bytes]:
+def get_xml_content(
+    url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+) -> Optional[FeedResponse]:
+    headers = {}
+
+    if etag is not None:
+        headers["If-None-Match"] = etag
+
+    if last_modified is not None:
+        headers["If-Modified-Since"] = last_modified
+
     try:
-        res = requests.get(url)
+        res = http_client.get(url, headers=headers, stream=True)
+    except Exception as e:
+        logger.error(f"Failed getting content from url: {url}. Cause: {e}")
+        return None
+
+    # Streamed responses hold their connection until closed, so only the
+    # response that is handed over for parsing is left open
+    if res.status_code == 304:
+        res.close()
+        return FeedResponse(None, etag, last_modified, not_modified=True)
 
-        return res.content
+    try:
+        res.raise_for_status()
     except Exception as e:
+        res.close()
         logger.error(f"Failed getting content from url: {url}. Cause: {e}")
+        return None
 
-    return None
+    return FeedResponse(res, res.headers.get("ETag"), res.headers.get("Last-Modified"))
 
 
 def get_additional_podcast_information(etree) -> dict:
     name = etree.find("channel/title", namespaces=etree.nsmap).text
     published_date = etree.find("channel/pubDate").text
 
-    published_date = get_datetime(published_date)
+    published_date = parse_pub_date(published_date)
 
     return {"name": name, "published_date": published_date}
 
 
-def get_all_episodes_information(etree) -> List[dict]:
+def get_all_episodes_information(etree) -> List[Episode]:
     episode_items = etree.findall("channel/item", namespaces=etree.nsmap)
 
-    formatted_episodes_data = []
+    episodes = (episode_extractor.extract(item) for item in episode_items)
 
-    for item in episode_items:
-        title = item.find("title").text
-        link = item.find("link").text
-        published_date = get_datetime(item.find("pubDate").text)
-        external_id = item.find("guid").text
-        episode_number = item.find("{*}episode").text
-        episode_duration = item.find("{*}duration").text
+    return [episode for episode in episodes if episode is not None]
 
-        formatted_episodes_data.append(
-            {
-                "title": title,
-                "link": link,
-                "published_date": published_date,
-                "external_id": external_id,
-                "episode_number": episode_number,
-                "episode_duration": episode_duration,
-            }
+
+def release_element(element):
+    element.clear(keep_tail=True)
+
+    # Already processed siblings are dropped as well, otherwise the channel
+    # element keeps growing with empty items for the whole feed
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+
+def get_content_digest(podcast_data: dict, external_ids: List[str]) -> str:
+    published_date = podcast_data["published_date"]
+
+    digest = hashlib.sha256()
+
+    for value in (
+        podcast_data["name"],
+        published_date.isoformat() if published_date is not None else None,
+        *external_ids,
+    ):
+        # XML text can't contain NUL, so it safely separates the values
+        digest.update((value or "").encode() + b"\0")
+
+    return digest.hexdigest()
+
+
+def parse_feed(
+    chunks: Iterable[bytes],
+    known_external_ids: Set[str],
+    previous_content_digest: Optional[str] = None,
+) -> Tuple[dict, List[Episode]]:
+    """Incrementally parses feed chunks, stopping at the first known episode.
+
+    Parsing goes on until the content digest is complete, and stops right there
+    without returning episodes when it matches the previous one.
+    """
+    parser = etree.XMLPullParser(events=("end",))
+
+    podcast_data = {"name": None, "published_date": None, "content_digest": None}
+    episodes_data = []
+    digested_external_ids = []
+    reached_known_episode = False
+
+    for chunk in chunks:
+        parser.feed(chunk)
+
+        for _, element in parser.read_events():
+            parent = element.getparent()
+
+            if element.tag == "item":
+                episode = episode_extractor.extract(element)
+                release_element(element)
+
+                if episode is None:
+                    continue
+
+                if podcast_data["content_digest"] is None:
+                    digested_external_ids.append(episode.external_id)
+
+                    if len(digested_external_ids) == CONTENT_DIGEST_ITEMS:
+                        podcast_data["content_digest"] = get_content_digest(
+                            podcast_data, digested_external_ids
+                        )
+
+                        if podcast_data["content_digest"] == previous_content_digest:
+                            return podcast_data, []
+
+                if episode.external_id in known_external_ids:
+                    reached_known_episode = True
+                elif not reached_known_episode:
+                    episodes_data.append(episode)
+
+                if reached_known_episode and podcast_data["content_digest"]:
+                    return podcast_data, episodes_data
+            elif parent is not None and parent.tag == "channel":
+                if element.tag == "title":
+                    podcast_data["name"] = element.text
+                elif element.tag == "pubDate":
+                    podcast_data["published_date"] = parse_pub_date(element.text)
+
+    parser.close()
+
+    # Feeds with fewer items than the digest covers are digested as a whole
+    if podcast_data["content_digest"] is None:
+        podcast_data["content_digest"] = get_content_digest(
+            podcast_data, digested_external_ids
         )
 
-    return formatted_episodes_data
+        if podcast_data["content_digest"] == previous_content_digest:
+            return podcast_data, []
 
+    return podcast_data, episodes_data
 
-def main():
+
+def get_podcasts_to_scrape() -> List[dict]:
+    podcasts_to_scrape = os.environ.get("PODCASTS_TO_SCRAPE")
+
+    if podcasts_to_scrape is not None:
+        return json.loads(podcasts_to_scrape)
+
+    # Single podcast payload, used by tasks that are spawned for one feed only
     podcast_to_scrape = json.loads(os.environ.get("PODCAST_TO_SCRAPE", "{}"))
 
-    podcast_id = podcast_to_scrape["id"]
-    feed_url = podcast_to_scrape["feed_url"]
+    return [podcast_to_scrape] if podcast_to_scrape else []
+
+
+def get_podcast_check(podcast_id: str) -> PodcastCheck:
+    with metrics.timer("db_read"):
+        return PodcastCheck(
+            *get_feed_validators(podcast_id), get_podcast_stats(podcast_id)
+        )
+
+
+def fetch_feed(podcast_id: str, feed_url: str, check: PodcastCheck) -> FetchedFeed:
+    with metrics.timer("feed_fetch"):
+        feed_response = get_xml_content(feed_url, check.etag, check.last_modified)
+
+    if feed_response is None or feed_response.not_modified:
+        return FetchedFeed(feed_response)
+
+    # Closing the response ends the download when parsing stops early, or
+    # frees its connection when anything before or during parsing fails
+    with feed_response.response as response:
+        # Podcasts without stored episodes have nothing to stop parsing at
+        if check.stats is None or check.stats.episode_count == 0:
+            known_external_ids = set()
+        else:
+            with metrics.timer("db_read"):
+                known_external_ids = get_known_episode_ids(podcast_id)
+
+        download = FeedDownload(response)
+        started_at = time.perf_counter()
+
+        podcast_data, episodes_data = parse_feed(
+            download, known_external_ids, check.content_digest
+        )
+
+    # Parsing and downloading are interleaved, waiting on chunks is kept apart
+    metrics.add_time("feed_parse", time.perf_counter() - started_at - download.seconds)
+    metrics.add_time("feed_download", download.seconds)
+    metrics.add_bytes("feed_bytes", download.bytes)
+    metrics.add_host_stats(
+        feed_url, bytes=download.bytes, download_ms=download.seconds * 1000
+    )
 
-    xml_content = get_xml_content(feed_url)
+    return FetchedFeed(feed_response, podcast_data, episodes_data)
 
-    if xml_content is None:
+
+def persist_feed(podcast_id: str, check: PodcastCheck, fetched: FetchedFeed):
+    feed_response = fetched.feed_response
+
+    if feed_response is None:
+        metrics.add("feeds_failed")
+        mark_podcast_checked(podcast_id, FAILED_CHECK_RETRY_INTERVAL)
         return
 
-    root = etree.fromstring(xml_content)
+    if feed_response.not_modified:
+        metrics.add("feeds_not_modified")
+        logger.info(f"Feed for podcast: {podcast_id} has not changed since last check.")
+        mark_podcast_checked(podcast_id, get_next_check_interval(check.stats))
+        return
+
+    # Hosts that don't send validators still serve the same feed, which is
+    # recognised by its digest and needs nothing but the next check planned
+    if fetched.podcast_data["content_digest"] == check.content_digest:
+        metrics.add("feeds_unchanged")
+        logger.info(f"Feed for podcast: {podcast_id} has the same content digest.")
+        mark_podcast_checked(podcast_id, get_next_check_interval(check.stats))
+        return
+
+    with metrics.timer("persist"):
+        create_new_episodes(podcast_id, fetched.episodes_data)
+
+        # Validators are saved last, so a failed insert doesn't turn into a 304 later
+        update_podcast(
+            podcast_id,
+            fetched.podcast_data,
+            feed_response,
+            get_next_check_interval(get_podcast_stats(podcast_id)),
+        )
 
-    podcast_data = get_additional_podcast_information(root)
+    metrics.add("feeds_scraped")
+    metrics.add("episodes_found", len(fetched.episodes_data))
 
-    episodes_data = get_all_episodes_information(root)
 
-    update_podcast(podcast_id, podcast_data)
+def scrape_podcast(podcast_id: str, feed_url: str):
+    check = get_podcast_check(podcast_id)
+
+    persist_feed(podcast_id, check, fetch_feed(podcast_id, feed_url, check))
+
+
+async def scrape_podcasts(
+    podcasts: List[dict], concurrency: int, scheduler: HostScheduler
+):
+    # Fetching, parsing and persisting are blocking, so they are run on a pool
+    # sized to the concurrency limit while the event loop schedules the feeds
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=concurrency)
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape(podcast: dict):
+        podcast_id, feed_url = podcast["id"], podcast["feed_url"]
+
+        try:
+            async with semaphore:
+                check = await asyncio.to_thread(get_podcast_check, podcast_id)
+
+            # Host slot is taken first, so feeds waiting on a busy host don't
+            # hold the global concurrency slots that other hosts could use.
+            # It's held only until the feed is downloaded and parsed, writes
+            # don't keep requests to the host waiting.
+            async with scheduler.slot(feed_url), semaphore:
+                fetched = await asyncio.to_thread(
+                    fetch_feed, podcast_id, feed_url, check
+                )
+
+            async with semaphore:
+                await asyncio.to_thread(persist_feed, podcast_id, check, fetched)
+        except Exception as e:
+            metrics.add("podcasts_failed")
+            logger.error(f"Failed to scrape podcast: {podcast_id}. Cause: {e}")
+
+            # Otherwise a broken feed is scraped again as soon as its lease
+            # runs out, the same as failed fetches it's retried later
+            try:
+                async with semaphore:
+                    await asyncio.to_thread(
+                        mark_podcast_checked, podcast_id, FAILED_CHECK_RETRY_INTERVAL
+                    )
+            except Exception as e:
+                logger.error(f"Failed to reschedule podcast: {podcast_id}. Cause: {e}")
+
+    await asyncio.gather(*(scrape(podcast) for podcast in interleave_by_host(podcasts)))
+
+
+def run_scraper(podcasts: List[dict]):
+    concurrency = int(os.environ.get("SCRAPER_CONCURRENCY", "10"))
+    scheduler = HostScheduler(
+        requests_per_second=float(os.environ.get("HOST_REQUESTS_PER_SECOND", "5")),
+        burst=int(os.environ.get("HOST_BURST", "5")),
+        max_connections_per_host=int(os.environ.get("HOST_MAX_CONNECTIONS", "4")),
+    )
+
+    asyncio.run(scrape_podcasts(podcasts, concurrency, scheduler))
+
+
+@profiling.profile("podcast_scraper")
+@metrics.instrument("podcast_scraper")
+def main():
+    podcasts = get_podcasts_to_scrape()
+
+    if len(podcasts) == 0:
+        logger.info("No podcasts to scrape were passed to the task.")
+        return
 
-    create_new_episodes(podcast_id, episodes_data)
+    run_scraper(podcasts)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional
+
+MONTHS = {
+    month: number
+    for number, month in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun"]
+        + ["jul", "aug", "sep", "oct", "nov", "dec"],
+        start=1,
+    )
+}
+
+# Zone names allowed by RFC 822 plus ones commonly found in podcast feeds
+ZONE_OFFSETS_IN_HOURS = {
+    "UT": 0,
+    "UTC": 0,
+    "GMT": 0,
+    "Z": 0,
+    "EST": -5,
+    "EDT": -4,
+    "CST": -6,
+    "CDT": -5,
+    "MST": -7,
+    "MDT": -6,
+    "PST": -8,
+    "PDT": -7,
+    "BST": 1,
+    "CET": 1,
+    "CEST": 2,
+}
+
+
+@lru_cache(maxsize=512)
+def get_timezone(zone: str) -> timezone:
+    """Resolves `+0100`, `-05:00` or a zone name into a shared tzinfo."""
+    if zone.upper() in ZONE_OFFSETS_IN_HOURS:
+        offset = timedelta(hours=ZONE_OFFSETS_IN_HOURS[zone.upper()])
+    else:
+        digits = zone[1:].replace(":", "")
+
+        if zone[0] not in "+-" or len(digits) != 4 or not digits.isdigit():
+            raise ValueError(f"Unknown timezone: {zone}")
+
+        offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+
+        if zone[0] == "-":
+            offset = -offset
+
+    return timezone.utc if not offset else timezone(offset)
+
+
+def parse_pub_date(value: Optional[str]) -> Optional[datetime]:
+    """Parses RFC 822 dates used in feeds' pubDate, None when it isn't a date.
+
+    The format almost every feed uses is split by hand, which is several times
+    faster than strptime and tolerates named zones, missing seconds or weekday
+    and single digit days. Anything else falls back to the email date parser
+    and ISO 8601.
+    """
+    if value is None:
+        return None
+
+    parts = value.split()
+
+    # Weekday is only informative, "Mon, 05 Dec 2022 ..." and "05 Dec 2022 ..."
+    if parts and not parts[0][0].isdigit():
+        parts = parts[1:]
+
+    try:
+        if len(parts) == 4:
+            day, month, year, clock = parts
+            zone = "UTC"
+        else:
+            day, month, year, clock, zone = parts
+
+        time_parts = clock.split(":")
+        hour, minute = time_parts[0], time_parts[1]
+        second = time_parts[2] if len(time_parts) == 3 else "0"
+        year = int(year)
+
+        return datetime(
+            year + 2000 if year < 100 else year,
+            MONTHS[month[:3].lower()],
+            int(day),
+            int(hour),
+            int(minute),
+            int(second),
+            tzinfo=get_timezone(zone),
+        )
+    except (ValueError, KeyError, IndexError):
+        return parse_pub_date_fallback(value)
+
+
+def parse_pub_date_fallback(value: str) -> Optional[datetime]:
+    try:
+        published_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            published_date = datetime.fromisoformat(
+                value.strip().replace("Z", "+00:00")
+            )
+        except ValueError:
+            return None
+
+    if published_date.tzinfo is None:
+        published_date = published_date.replace(tzinfo=timezone.utc)
+
+    return published_date
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+MIN_CHECK_INTERVAL = timedelta(hours=1)
+MAX_CHECK_INTERVAL = timedelta(days=7)
+
+# Used until a podcast has enough episodes to estimate how often it publishes
+DEFAULT_CHECK_INTERVAL = timedelta(days=1)
+
+# Failed fetches are retried sooner than a dormant podcast would be checked
+FAILED_CHECK_RETRY_INTERVAL = timedelta(hours=6)
+
+# How many times a podcast is checked within its average publishing interval
+CHECKS_PER_PUBLISHING_INTERVAL = 24
+
+# Podcasts without a new episode for this long are checked only weekly
+DORMANT_AFTER = timedelta(days=60)
+
+
+def get_check_interval_from_summary(
+    latest_published_date: Optional[datetime],
+    publishing_interval: Optional[timedelta],
+    now: datetime,
+) -> timedelta:
+    """Derives how often a feed should be checked from its podcast stats.
+
+    Daily shows end up being checked hourly and dormant shows weekly.
+    """
+    if latest_published_date is None:
+        return DEFAULT_CHECK_INTERVAL
+
+    if now - latest_published_date > DORMANT_AFTER:
+        return MAX_CHECK_INTERVAL
+
+    if publishing_interval is None:
+        return DEFAULT_CHECK_INTERVAL
+
+    return min(
+        max(publishing_interval / CHECKS_PER_PUBLISHING_INTERVAL, MIN_CHECK_INTERVAL),
+        MAX_CHECK_INTERVAL,
+    )
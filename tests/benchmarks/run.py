@@ -0,0 +1,359 @@
+"""Micro-benchmarks for the parse and persist hot paths.
+
+Every run is appended to a JSON lines history file and compared with the
+previous run of the same benchmark, so regressions show up between commits.
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, List, NamedTuple
+
+from tools.local_pipeline.runner import setup_import_paths
+
+from . import synthetic
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.jsonl")
+
+FEED_SIZES = [10, 100, 1000, 5000, 20000]
+QUICK_FEED_SIZES = [10, 100, 1000]
+SHOW_NOTES_SIZES = {"small": 200, "large": 4000}
+CHART_SIZES = [10, 200, 2000, 20000]
+QUICK_CHART_SIZES = [10, 200]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    params: dict
+    # Called before every repetition, returns the function that is timed
+    prepare: Callable[[], Callable[[], object]]
+
+
+def get_parse_benchmarks(quick: bool) -> List[Benchmark]:
+    import main as podcast_scraper
+    from itunes_category_parser import get_links_from_sub_genres
+    from itunes_popular_podcast_parser import get_links_from_podcasts
+    from lxml import etree
+
+    benchmarks = []
+
+    for items in QUICK_FEED_SIZES if quick else FEED_SIZES:
+        for show_notes, show_notes_size in SHOW_NOTES_SIZES.items():
+            feed = synthetic.generate_feed(items, show_notes_size)
+            root = etree.fromstring(feed)
+            params = {"items": items, "show_notes": show_notes, "bytes": len(feed)}
+
+            benchmarks += [
+                Benchmark(
+                    "get_all_episodes_information",
+                    params,
+                    lambda root=root: lambda: (
+                        podcast_scraper.get_all_episodes_information(root)
+                    ),
+                ),
+                Benchmark(
+                    "get_additional_podcast_information",
+                    params,
+                    lambda root=root: lambda: (
+                        podcast_scraper.get_additional_podcast_information(root)
+                    ),
+                ),
+                Benchmark(
+                    "parse_feed",
+                    params,
+                    lambda feed=feed: lambda: podcast_scraper.parse_feed(
+                        (
+                            feed[i : i + podcast_scraper.FEED_CHUNK_SIZE]
+                            for i in range(
+                                0, len(feed), podcast_scraper.FEED_CHUNK_SIZE
+                            )
+                        ),
+                        set(),
+                    ),
+                ),
+            ]
+
+    for size in QUICK_CHART_SIZES if quick else CHART_SIZES:
+        chart = synthetic.generate_chart_html(size)
+        categories = synthetic.generate_categories_html(size)
+
+        benchmarks += [
+            Benchmark(
+                "get_links_from_podcasts",
+                {"links": size},
+                lambda chart=chart: lambda: get_links_from_podcasts(chart),
+            ),
+            Benchmark(
+                "get_links_from_sub_genres",
+                {"links": size},
+                lambda categories=categories: lambda: get_links_from_sub_genres(
+                    categories
+                ),
+            ),
+        ]
+
+    return benchmarks
+
+
+def get_pub_date_benchmarks(quick: bool) -> List[Benchmark]:
+    from pub_date import parse_pub_date
+
+    PUBLISHED_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S %z"
+    count = 1000 if quick else 20000
+
+    standard = synthetic.generate_pub_dates(synthetic.STANDARD_PUB_DATES, count)
+    variants = synthetic.generate_pub_dates(synthetic.VARIANT_PUB_DATES, count)
+
+    # strptime is the previous implementation, it fails on most of the variants
+    return [
+        Benchmark(
+            "strptime",
+            {"dates": count, "samples": "standard"},
+            lambda: lambda: [
+                datetime.datetime.strptime(value, PUBLISHED_DATE_FORMAT)
+                for value in standard
+            ],
+        ),
+        Benchmark(
+            "parse_pub_date",
+            {"dates": count, "samples": "standard"},
+            lambda: lambda: [parse_pub_date(value) for value in standard],
+        ),
+        Benchmark(
+            "parse_pub_date",
+            {"dates": count, "samples": "variants"},
+            lambda: lambda: [parse_pub_date(value) for value in variants],
+        ),
+    ]
+
+
+def get_persist_benchmarks(quick: bool) -> List[Benchmark]:
+    import uuid
+
+    import main as podcast_scraper
+    from db.base import get_session
+    import db.models as models
+    from lxml import etree
+
+    def create_podcast() -> str:
+        session = get_session()
+
+        with session.begin():
+            podcast = models.Podcast(
+                collection_id=f"benchmark-{uuid.uuid4()}",
+                track_id="benchmark",
+                feed_url="https://example.com/feed",
+            )
+            session.add(podcast)
+            session.flush()
+
+            return podcast.id
+
+    benchmarks = []
+
+    for items in QUICK_FEED_SIZES if quick else FEED_SIZES:
+        episodes = podcast_scraper.get_all_episodes_information(
+            etree.fromstring(synthetic.generate_feed(items, 0))
+        )
+
+        for name in ("insert_new_episodes", "copy_new_episodes"):
+
+            def prepare(episodes=episodes, name=name):
+                podcast_id = create_podcast()
+                persist = getattr(podcast_scraper, name)
+
+                return lambda: persist(podcast_id, episodes)
+
+            benchmarks.append(Benchmark(name, {"items": items}, prepare))
+
+    return benchmarks
+
+
+def remove_benchmark_podcasts():
+    from db.base import get_session
+
+    session = get_session()
+
+    with session.begin():
+        for table in ("podcast_episode", "podcast_stats"):
+            session.execute(
+                f"DELETE FROM {table} WHERE podcast_id IN "
+                "(SELECT id FROM podcast WHERE collection_id LIKE 'benchmark-%')"
+            )
+        session.execute("DELETE FROM podcast WHERE collection_id LIKE 'benchmark-%'")
+
+
+def get_rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure_peak_memory(function: Callable[[], object]) -> dict:
+    """Peak memory of one call.
+
+    tracemalloc only sees Python allocations, while lxml allocates most of its
+    memory through libxml2, so resident memory is sampled alongside it.
+    """
+    peak_rss = baseline_rss = get_rss() if os.path.exists("/proc/self/statm") else 0
+    running = baseline_rss > 0
+
+    def sample_rss():
+        nonlocal peak_rss
+
+        while running:
+            peak_rss = max(peak_rss, get_rss())
+            time.sleep(0.002)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+
+    tracemalloc.start()
+    result = function()
+    _, peak_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    running = False
+    sampler.join()
+
+    del result
+
+    return {
+        "peak_python_bytes": peak_python,
+        "peak_rss_delta_bytes": max(peak_rss, get_rss() if baseline_rss else 0)
+        - baseline_rss,
+    }
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int) -> dict:
+    timings = []
+
+    for _ in range(repeat):
+        function = benchmark.prepare()
+
+        gc.collect()
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+
+    gc.collect()
+
+    return {
+        "benchmark": benchmark.name,
+        "params": benchmark.params,
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        **measure_peak_memory(benchmark.prepare()),
+    }
+
+
+def get_commit() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return "unknown"
+
+
+def get_key(result: dict) -> str:
+    return f"{result['benchmark']} {json.dumps(result['params'], sort_keys=True)}"
+
+
+def load_previous_results(path: str) -> dict:
+    previous_results = {}
+
+    if os.path.exists(path):
+        with open(path) as history:
+            for line in history:
+                result = json.loads(line)
+                previous_results[get_key(result)] = result
+
+    return previous_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true", help="only small sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="run matching benchmarks only")
+    parser.add_argument(
+        "--db", action="store_true", help="include persistence benchmarks"
+    )
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--no-history", action="store_true")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="tolerated slowdown ratio"
+    )
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    setup_import_paths()
+
+    benchmarks = get_parse_benchmarks(args.quick) + get_pub_date_benchmarks(args.quick)
+
+    if args.db:
+        benchmarks += get_persist_benchmarks(args.quick)
+
+    benchmarks = [
+        benchmark for benchmark in benchmarks if args.filter in benchmark.name
+    ]
+
+    previous_results = load_previous_results(args.history)
+    commit = get_commit()
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    regressions = []
+    results = []
+
+    try:
+        for benchmark in benchmarks:
+            result = {
+                "timestamp": timestamp,
+                "commit": commit,
+                **run_benchmark(benchmark, args.repeat),
+            }
+            results.append(result)
+
+            previous = previous_results.get(get_key(result))
+            change = ""
+
+            if previous is not None:
+                ratio = result["median_seconds"] / previous["median_seconds"] - 1
+                change = f"{ratio:+.0%} vs {previous['commit']}"
+
+                if ratio > args.threshold:
+                    regressions.append(get_key(result))
+                    change += " REGRESSION"
+
+            print(
+                f"{get_key(result):<85} "
+                f"{result['median_seconds'] * 1000:>10.2f} ms "
+                f"{result['peak_python_bytes'] / 2 ** 20:>8.1f} MiB py "
+                f"{result['peak_rss_delta_bytes'] / 2 ** 20:>8.1f} MiB rss  {change}"
+            )
+    finally:
+        if args.db:
+            remove_benchmark_podcasts()
+
+    if not args.no_history:
+        with open(args.history, "a") as history:
+            for result in results:
+                history.write(json.dumps(result) + "\n")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(f"{len(regressions)} benchmarks regressed: {regressions}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+SHOW_NOTES_PARAGRAPH = (
+    "In this episode we talk about podcasts, feeds and everything in between. "
+    "Links and timestamps for all topics can be found below. "
+)
+
+
+def generate_show_notes(size: int) -> str:
+    paragraphs = SHOW_NOTES_PARAGRAPH * (size // len(SHOW_NOTES_PARAGRAPH) + 1)
+
+    return paragraphs[:size]
+
+
+def generate_feed(items: int, show_notes_size: int) -> bytes:
+    published_at = datetime(2022, 12, 1, tzinfo=timezone.utc)
+    show_notes = generate_show_notes(show_notes_size)
+
+    episodes = "".join(
+        "<item>"
+        f"<title>Episode {number}</title>"
+        f"<link>https://example.com/episodes/{number}</link>"
+        f"<pubDate>{format_datetime(published_at - timedelta(days=items - number))}"
+        "</pubDate>"
+        f'<guid isPermaLink="false">episode-{number}</guid>'
+        f"<description><![CDATA[{show_notes}]]></description>"
+        f"<itunes:episode>{number}</itunes:episode>"
+        "<itunes:duration>00:42:17</itunes:duration>"
+        "</item>"
+        for number in range(items, 0, -1)
+    )
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" '
+        'xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">'
+        "<channel><title>Benchmark podcast</title>"
+        f"<pubDate>{format_datetime(published_at)}</pubDate>"
+        f"{episodes}</channel></rss>"
+    ).encode()
+
+
+def generate_chart_html(podcasts: int) -> bytes:
+    links = "".join(
+        f'<li><a href="https://podcasts.apple.com/us/podcast/podcast-{id}/id{id}">'
+        f"Podcast {id}</a></li>"
+        for id in range(1, podcasts + 1)
+    )
+
+    return (
+        "<html><head><title>Top podcasts</title></head><body>"
+        f'<div id="selectedcontent"><ul>{links}</ul></div></body></html>'
+    ).encode()
+
+
+def generate_categories_html(categories: int) -> bytes:
+    links = "".join(
+        f'<li><a href="https://podcasts.apple.com/us/genre/podcasts-{id}/id{id}">'
+        f"Category {id}</a></li>"
+        for id in range(1, categories + 1)
+    )
+
+    return (
+        '<html><body><div id="genre-nav">'
+        f'<ul class="list top-level-subgenres">{links}</ul></div></body></html>'
+    ).encode()
+
+
+# pubDate values in the shapes they are found in real feeds
+STANDARD_PUB_DATES = [
+    "Mon, 05 Dec 2022 10:00:00 +0000",
+    "Tue, 13 Sep 2022 18:45:07 +0200",
+    "Wed, 01 Jun 2022 04:00:00 -0400",
+    "Fri, 25 Nov 2022 23:59:59 -0800",
+]
+
+VARIANT_PUB_DATES = STANDARD_PUB_DATES + [
+    "Mon, 05 Dec 2022 10:00:00 GMT",
+    "Thu, 1 Dec 2022 05:00:00 EST",
+    "Sat, 03 Dec 2022 10:00 +0000",
+    "Sun, 04 Dec 2022 10:00:00 PST",
+    "04 Dec 2022 10:00:00 +0100",
+    "2022-12-04T10:00:00Z",
+]
+
+
+def generate_pub_dates(samples: list, count: int) -> list:
+    return [samples[i % len(samples)] for i in range(count)]
@@ -0,0 +1,17 @@
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+sys.path.insert(0, os.path.join(ROOT, "src", "lambdas"))
+sys.path.insert(0, os.path.join(ROOT, "src", "tasks", "podcast_scraper", "src"))
+# Local stand-ins for AWS services are shared with tools.local_pipeline
+sys.path.append(ROOT)
+
+# Lambdas and the scraper task import the layers as `db` and `common`
+# packages, the same way they are laid out when deployed
+for package, layer in (("db", "db_layer"), ("common", "common_layer")):
+    module = types.ModuleType(package)
+    module.__path__ = [os.path.join(ROOT, "src", layer)]
+    sys.modules.setdefault(package, module)
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+UNIT_TESTS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time of every entry point, measured at around 75, 265, 300
+# and 365 ms on a developer machine. Budgets leave room for slower machines,
+# which can scale them further with IMPORT_TIME_BUDGET_SCALE.
+IMPORT_TIME_BUDGETS_MS = {
+    "itunes_category_parser": 200,
+    "itunes_popular_podcast_parser": 500,
+    "mediator_podcast_scraper": 550,
+    "main": 650,
+}
+
+# Heavy modules that would only be loaded for code paths an invocation may not take
+LAZY_IMPORTS = {
+    "itunes_category_parser": ["boto3", "pyquery", "sqlalchemy", "alembic"],
+    "itunes_popular_podcast_parser": ["boto3", "pyquery", "alembic"],
+    "mediator_podcast_scraper": ["boto3", "alembic"],
+    "main": ["boto3", "alembic"],
+}
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=UNIT_TESTS_DIRECTORY,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def measure_import_time_ms(module: str) -> float:
+    result = run_python("-X", "importtime", "-c", f"import conftest, {module}")
+
+    # Last line of the report is the module itself, with cumulative time in us
+    _, cumulative, name = result.stderr.strip().splitlines()[-1].split("|")
+
+    assert name.strip() == module
+
+    return int(cumulative) / 1000
+
+
+@pytest.mark.parametrize("module", IMPORT_TIME_BUDGETS_MS)
+def test_import_time_is_within_budget(module):
+    budget = IMPORT_TIME_BUDGETS_MS[module] * float(
+        os.environ.get("IMPORT_TIME_BUDGET_SCALE", "1")
+    )
+
+    import_time = min(measure_import_time_ms(module) for _ in range(3))
+
+    assert import_time <= budget, (
+        f"Importing {module} took {import_time:.0f} ms, "
+        f"which exceeds its {budget:.0f} ms budget"
+    )
+
+
+@pytest.mark.parametrize("module", LAZY_IMPORTS)
+def test_heavy_modules_are_imported_lazily(module):
+    result = run_python(
+        "-c",
+        f"import conftest, json, sys, {module}; print(json.dumps(list(sys.modules)))",
+    )
+
+    loaded_modules = set(json.loads(result.stdout))
+
+    assert [
+        heavy_module
+        for heavy_module in LAZY_IMPORTS[module]
+        if heavy_module in loaded_modules
+    ] == []
@@ -0,0 +1,201 @@
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import episode_archiver
+
+
+class LambdaContext:
+    def __init__(self, remaining_times_in_millis):
+        self.remaining_times_in_millis = iter(remaining_times_in_millis)
+
+    def get_remaining_time_in_millis(self):
+        return next(self.remaining_times_in_millis)
+
+
+def test_batches_are_archived_until_short_batch(monkeypatch):
+    monkeypatch.setenv("ARCHIVE_BATCH_SIZE", "100")
+    monkeypatch.setenv("EPISODE_RETENTION_DAYS", "30")
+
+    batches = iter([100, 100, 40, 100])
+    calls = []
+
+    def archive_episodes(retention, batch_size):
+        calls.append((retention, batch_size))
+        return next(batches)
+
+    monkeypatch.setattr(episode_archiver, "archive_episodes", archive_episodes)
+
+    episode_archiver.lambda_handler({}, LambdaContext([600000] * 4))
+
+    assert calls == [(timedelta(days=30), 100)] * 3
+
+
+def test_archiving_stops_before_lambda_timeout(monkeypatch):
+    monkeypatch.setenv("ARCHIVE_BATCH_SIZE", "100")
+
+    calls = []
+
+    def archive_episodes(retention, batch_size):
+        calls.append(batch_size)
+        return batch_size
+
+    monkeypatch.setattr(episode_archiver, "archive_episodes", archive_episodes)
+
+    episode_archiver.lambda_handler({}, LambdaContext([600000, 300000, 30000]))
+
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def podcasts():
+    import uuid
+    from sqlalchemy import delete, insert, select
+
+    from db.base import get_session
+    import db.models as models
+
+    now = datetime.now(timezone.utc)
+    session = get_session()
+    podcasts = {
+        name: uuid.uuid4() for name in ("dormant", "publishing", "marked_inactive")
+    }
+    published_dates = {
+        "dormant": [now - timedelta(days=800), now - timedelta(days=400)],
+        "publishing": [now - timedelta(days=800), now - timedelta(days=1)],
+        "marked_inactive": [now - timedelta(days=800), now - timedelta(days=1)],
+    }
+
+    with session.begin():
+        session.execute(
+            insert(models.Podcast.__table__),
+            [
+                {
+                    "id": id,
+                    "collection_id": f"archiver-test-{id}",
+                    "track_id": f"archiver-test-{id}",
+                    "feed_url": f"https://example.com/{id}",
+                    "status": (
+                        models.PodcastStatus.Inactive.value
+                        if name == "marked_inactive"
+                        else models.PodcastStatus.Active.value
+                    ),
+                }
+                for name, id in podcasts.items()
+            ],
+        )
+        session.execute(
+            insert(models.PodcastEpisode.__table__),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "podcast_id": podcasts[name],
+                    "external_id": f"{name}-{i}",
+                    "published_date": published_date,
+                }
+                for name, dates in published_dates.items()
+                for i, published_date in enumerate(dates)
+            ],
+        )
+        session.execute(
+            insert(models.PodcastStats.__table__),
+            [
+                {
+                    "podcast_id": podcasts[name],
+                    "episode_count": len(dates),
+                    "dated_episode_count": len(dates),
+                    "earliest_published_date": min(dates),
+                    "latest_published_date": max(dates),
+                }
+                for name, dates in published_dates.items()
+            ],
+        )
+
+    def get_external_ids(model):
+        with session.begin():
+            return set(
+                session.execute(
+                    select(model.external_id).where(
+                        model.podcast_id.in_(podcasts.values())
+                    )
+                ).scalars()
+            )
+
+    yield SimpleNamespace(ids=podcasts, get_external_ids=get_external_ids)
+
+    with session.begin():
+        for model in (
+            models.PodcastEpisodeArchive,
+            models.PodcastEpisode,
+            models.PodcastStats,
+        ):
+            session.execute(
+                delete(model).where(model.podcast_id.in_(podcasts.values()))
+            )
+
+        session.execute(
+            delete(models.Podcast).where(models.Podcast.id.in_(podcasts.values()))
+        )
+
+
+@pytest.mark.skipif("DB_HOST" not in os.environ, reason="needs a database")
+def test_old_episodes_of_inactive_podcasts_are_archived(podcasts):
+    import db.models as models
+
+    while episode_archiver.archive_episodes(timedelta(days=365), 1000) == 1000:
+        pass
+
+    assert podcasts.get_external_ids(models.PodcastEpisodeArchive) == {
+        "dormant-0",
+        "dormant-1",
+        "marked_inactive-0",
+    }
+    assert podcasts.get_external_ids(models.PodcastEpisode) == {
+        "publishing-0",
+        "publishing-1",
+        "marked_inactive-1",
+    }
+
+
+@pytest.mark.skipif("DB_HOST" not in os.environ, reason="needs a database")
+@pytest.mark.parametrize("copy_threshold", [1000, 0])
+def test_archived_episodes_are_not_scraped_again(podcasts, copy_threshold, monkeypatch):
+    import main
+    from db.base import get_session
+    import db.models as models
+
+    monkeypatch.setattr(main, "EPISODES_COPY_THRESHOLD", copy_threshold)
+
+    while episode_archiver.archive_episodes(timedelta(days=365), 1000) == 1000:
+        pass
+
+    podcast_id = str(podcasts.ids["dormant"])
+
+    assert {"dormant-0", "dormant-1"} <= main.get_known_episode_ids(podcast_id)
+
+    # Podcast publishes again and its feed still lists the archived episodes
+    main.create_new_episodes(
+        podcast_id,
+        [main.Episode("New", None, datetime.now(timezone.utc), "dormant-2", 3, None)]
+        + [
+            main.Episode("Old", None, None, f"dormant-{i}", i + 1, None)
+            for i in range(2)
+        ],
+    )
+
+    session = get_session()
+
+    with session.begin():
+        episode_count = (
+            session.query(models.PodcastStats.episode_count)
+            .filter(models.PodcastStats.podcast_id == podcast_id)
+            .scalar()
+        )
+
+    assert "dormant-2" in podcasts.get_external_ids(models.PodcastEpisode)
+    assert not {"dormant-0", "dormant-1"} & podcasts.get_external_ids(
+        models.PodcastEpisode
+    )
+    assert episode_count == 3
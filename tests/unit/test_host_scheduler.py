@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import common.http_client as http_client
+from host_scheduler import HostScheduler, interleave_by_host
+
+
+class FakeFeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay: float):
+        super().__init__(("127.0.0.1", 0), FakeFeedHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = {}
+        self.max_active = {}
+        self.requested_at = {}
+
+
+class FakeFeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        host = self.headers["Host"].split(":")[0]
+
+        with server.lock:
+            server.active[host] = server.active.get(host, 0) + 1
+            server.max_active[host] = max(
+                server.max_active.get(host, 0), server.active[host]
+            )
+            server.requested_at.setdefault(host, []).append(time.monotonic())
+
+        time.sleep(server.delay)
+
+        with server.lock:
+            server.active[host] -= 1
+
+        body = b"<rss><channel></channel></rss>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def feed_server():
+    server = FakeFeedServer(delay=0.1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def fetch_all(scheduler: HostScheduler, urls):
+    async def fetch(url):
+        async with scheduler.slot(url):
+            return await asyncio.to_thread(http_client.get, url)
+
+    async def run():
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
+    return asyncio.run(run())
+
+
+def test_concurrent_fetches_per_host_are_capped(feed_server):
+    port = feed_server.server_port
+    urls = [f"http://127.0.0.1:{port}/feed/{i}" for i in range(8)] + [
+        f"http://localhost:{port}/feed/{i}" for i in range(8)
+    ]
+
+    responses = fetch_all(
+        HostScheduler(requests_per_second=1000, burst=1000, max_connections_per_host=2),
+        urls,
+    )
+
+    assert all(response.status_code == 200 for response in responses)
+    assert feed_server.max_active["127.0.0.1"] == 2
+    assert feed_server.max_active["localhost"] == 2
+
+
+def test_request_rate_per_host_is_limited(feed_server):
+    port = feed_server.server_port
+    urls = [f"http://127.0.0.1:{port}/feed/{i}" for i in range(6)]
+
+    fetch_all(
+        HostScheduler(requests_per_second=10, burst=2, max_connections_per_host=6),
+        urls,
+    )
+
+    requested_at = feed_server.requested_at["127.0.0.1"]
+
+    # Two requests fit into the burst, the remaining four wait for tokens
+    assert requested_at[-1] - requested_at[0] >= 0.35
+
+
+def test_interleave_by_host():
+    podcasts = [
+        {"id": 1, "feed_url": "https://a.com/1"},
+        {"id": 2, "feed_url": "https://a.com/2"},
+        {"id": 3, "feed_url": "https://a.com/3"},
+        {"id": 4, "feed_url": "https://b.com/1"},
+        {"id": 5, "feed_url": "https://c.com/1"},
+    ]
+
+    assert [podcast["id"] for podcast in interleave_by_host(podcasts)] == [
+        1,
+        4,
+        5,
+        2,
+        3,
+    ]
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+import common.http_client as http_client
+from tools.local_pipeline.fake_server import FakeItunesServer
+
+
+@pytest.fixture
+def server():
+    server = FakeItunesServer(
+        categories=1, podcasts_per_category=1, episodes_per_feed=1
+    )
+    server.start()
+
+    yield server
+
+    server.stop()
+
+
+@pytest.fixture
+def single_connection_pool(monkeypatch):
+    monkeypatch.setattr(http_client, "connections_per_host", 1)
+    http_client.get_http_session.cache_clear()
+
+    yield
+
+    http_client.get_http_session.cache_clear()
+
+
+def test_error_responses_dont_exhaust_host_pool(server, single_connection_pool):
+    statuses = []
+
+    # Streamed error responses are left open, the way a leaking caller would
+    def request_repeatedly():
+        for _ in range(5):
+            res = http_client.get(f"{server.base_url}/missing", stream=True)
+            statuses.append(res.status_code)
+
+    thread = threading.Thread(target=request_repeatedly, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive(), "requests to the host are blocked"
+    assert statuses == [404] * 5
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import itunes_category_parser
+from tools.local_pipeline.stand_ins import InMemorySqs
+
+QUEUE_URL = "local://popular-podcasts-fetch-queue"
+
+
+class FlakySqs(InMemorySqs):
+    """Fails the first entry of every batch request once."""
+
+    def __init__(self):
+        super().__init__()
+        self.batch_requests = []
+        self.failed_bodies = set()
+
+    def send_message_batch(self, QueueUrl, Entries, **kwargs):
+        self.batch_requests.append(len(Entries))
+
+        first, *rest = Entries
+
+        if first["MessageBody"] in self.failed_bodies:
+            return super().send_message_batch(QueueUrl, Entries)
+
+        self.failed_bodies.add(first["MessageBody"])
+        response = super().send_message_batch(QueueUrl, rest) if rest else {}
+
+        return {
+            "Successful": response.get("Successful", []),
+            "Failed": [{"Id": first["Id"], "SenderFault": False, "Code": "Internal"}],
+        }
+
+
+@pytest.fixture(autouse=True)
+def queue_environment(monkeypatch):
+    monkeypatch.setenv("POPULAR_PODCASTS_QUEUE_URL", QUEUE_URL)
+
+
+def test_events_are_sent_in_batches(monkeypatch):
+    sqs = InMemorySqs()
+    monkeypatch.setattr(itunes_category_parser, "get_sqs_client", lambda: sqs)
+
+    events = [{"categories_urls_to_parse": [f"url-{i}"]} for i in range(23)]
+
+    itunes_category_parser.send_events_for_parsing_popular_podcasts(events)
+
+    received = get_received_bodies(sqs)
+
+    assert received == events
+
+
+def test_failed_batch_entries_are_resent(monkeypatch):
+    sqs = FlakySqs()
+    monkeypatch.setattr(itunes_category_parser, "get_sqs_client", lambda: sqs)
+
+    events = [{"categories_urls_to_parse": [f"url-{i}"]} for i in range(12)]
+
+    itunes_category_parser.send_events_for_parsing_popular_podcasts(events)
+
+    received = get_received_bodies(sqs)
+
+    assert sorted(received, key=json.dumps) == sorted(events, key=json.dumps)
+    assert sqs.batch_requests == [10, 1, 2, 1]
+
+
+def get_received_bodies(sqs: InMemorySqs):
+    event = sqs.receive_event(QUEUE_URL, batch_size=sqs.size(QUEUE_URL))
+
+    return [json.loads(record["body"]) for record in event["Records"]]
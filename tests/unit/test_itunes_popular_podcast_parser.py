@@ -0,0 +1,302 @@
+import json
+
+import pytest
+
+import itunes_popular_podcast_parser
+from tools.local_pipeline.stand_ins import InMemorySqs
+
+QUEUE_URL = "local://popular-podcasts-fetch-queue"
+
+
+def test_only_failed_records_are_reported(monkeypatch):
+    sqs = InMemorySqs()
+
+    for i in range(6):
+        message = {"categories_urls_to_parse": [f"url-{i}"]}
+
+        # Every other message comes through the SNS envelope
+        body = {"Message": json.dumps(message)} if i % 2 else message
+        sqs.send_message(QUEUE_URL, json.dumps(body))
+
+    sqs.send_message(QUEUE_URL, "not json")
+
+    processed = []
+
+    def process_message(message):
+        (url,) = message["categories_urls_to_parse"]
+
+        if url == "url-3":
+            raise RuntimeError("Lookup failed")
+
+        processed.append(url)
+
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "process_message", process_message
+    )
+
+    event = sqs.receive_event(QUEUE_URL)
+    failed_ids = {
+        record["messageId"]
+        for record in event["Records"]
+        if record["body"] == "not json" or "url-3" in record["body"]
+    }
+
+    response = itunes_popular_podcast_parser.lambda_handler(event, None)
+
+    assert {
+        failure["itemIdentifier"] for failure in response["batchItemFailures"]
+    } == failed_ids
+    assert sorted(processed) == ["url-0", "url-1", "url-2", "url-4", "url-5"]
+
+
+def test_failed_category_fails_the_message(monkeypatch):
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "get_html_content", lambda url: None
+    )
+
+    with pytest.raises(RuntimeError):
+        itunes_popular_podcast_parser.process_message(
+            {"categories_urls_to_parse": ["url-0"]}
+        )
+
+
+def test_lookup_cache_skips_recently_looked_up_ids(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    now = datetime.now(timezone.utc)
+    queried = []
+
+    def get_recently_looked_up_ids(ids, since):
+        queried.append(ids)
+
+        looked_up_at = {"2": now - timedelta(hours=1), "3": now - timedelta(days=30)}
+
+        return [
+            (id, looked_up_at[id])
+            for id in ids
+            if id in looked_up_at and looked_up_at[id] > since
+        ]
+
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser,
+        "get_recently_looked_up_ids",
+        get_recently_looked_up_ids,
+    )
+
+    cache = itunes_popular_podcast_parser.LookupCache(ttl=timedelta(days=7), max_size=2)
+    cache.add([("1", now)])
+
+    assert cache.get_stale_ids(["1", "2", "3", "4"]) == ["3", "4"]
+    assert queried == [["2", "3", "4"]]
+
+    # Id 2 was loaded from the table and is served from memory now
+    assert cache.get_stale_ids(["1", "2"]) == []
+    assert queried == [["2", "3", "4"]]
+
+    cache.add([("5", now)])
+
+    assert list(cache.looked_up_at_by_id) == ["2", "5"]
+
+
+class FreshLookupCache:
+    def add(self, looked_up_ids):
+        pass
+
+    def get_stale_ids(self, ids):
+        return list(ids)
+
+
+def chart_page(ids, links_without_href=0):
+    links = '<li><a title="No link">No link</a></li>' * links_without_href + "".join(
+        f'<li><a href="https://podcasts.apple.com/us/podcast/p/id{id}">{id}</a></li>'
+        for id in ids
+    )
+
+    return f'<div id="selectedcontent"><ul>{links}</ul></div>'.encode()
+
+
+def process_message_in_thread(message):
+    from threading import Thread
+
+    failures = []
+
+    def target():
+        try:
+            itunes_popular_podcast_parser.process_message(message)
+        except Exception as e:
+            failures.append(e)
+
+    thread = Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+
+    assert not thread.is_alive(), "pipeline didn't finish"
+
+    return failures
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    pages = {}
+    looked_up = []
+    persisted = []
+
+    def lookup_podcasts(links_by_id):
+        looked_up.extend(links_by_id)
+
+        return [{"collection_id": id} for id in links_by_id]
+
+    monkeypatch.setattr(itunes_popular_podcast_parser, "get_html_content", pages.get)
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "lookup_podcasts", lookup_podcasts
+    )
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser,
+        "persist_data",
+        lambda podcasts, looked_up_at: persisted.extend(
+            podcast["collection_id"] for podcast in podcasts
+        ),
+    )
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "get_lookup_cache", FreshLookupCache
+    )
+
+    return pages, looked_up, persisted
+
+
+def test_pipeline_dedupes_ids_and_skips_links_without_href(pipeline):
+    pages, looked_up, persisted = pipeline
+
+    # Link without a href comes first and is followed by more links than
+    # the queues between the stages hold
+    pages["url-0"] = chart_page(range(1500), links_without_href=1)
+    pages["url-1"] = chart_page(range(1000, 2000))
+
+    failures = process_message_in_thread(
+        {"categories_urls_to_parse": ["url-0", "url-1"]}
+    )
+
+    assert failures == []
+    assert sorted(looked_up) == sorted(str(id) for id in range(2000))
+    assert sorted(persisted) == sorted(looked_up)
+
+
+def test_pipeline_fails_the_message_when_a_stage_stops(pipeline, monkeypatch):
+    pages, _, persisted = pipeline
+    pages["url-0"] = chart_page(range(3000))
+
+    def get_podcast_id_from_link(link):
+        raise ValueError(f"Unexpected link: {link}")
+
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser,
+        "get_podcast_id_from_link",
+        get_podcast_id_from_link,
+    )
+
+    failures = process_message_in_thread({"categories_urls_to_parse": ["url-0"]})
+
+    assert len(failures) == 1
+    assert "Looking up podcasts stopped." in str(failures[0])
+    assert persisted == []
+
+
+def lookup_result(id):
+    return {
+        "collectionId": int(id),
+        "trackId": int(id),
+        "feedUrl": f"https://example.com/feed/{id}",
+        "genreIds": ["1310", "26"],
+        "genres": ["Music", "Podcasts"],
+    }
+
+
+def test_lookup_maps_results_back_by_collection_id(monkeypatch):
+    requested = []
+
+    def get_podcasts_data(ids):
+        requested.append(ids)
+
+        # Id 2 is missing, results come in a different order and one of
+        # them isn't a podcast
+        return {
+            "results": [
+                {"wrapperType": "artist", "artistId": 7},
+                lookup_result("3"),
+                lookup_result("1"),
+            ]
+        }
+
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "get_podcasts_data", get_podcasts_data
+    )
+
+    podcasts = itunes_popular_podcast_parser.lookup_podcasts(
+        {id: f"https://podcasts.apple.com/id{id}" for id in ("1", "2", "3")}
+    )
+
+    assert requested == [["1", "2", "3"]]
+    assert [podcast["collection_id"] for podcast in podcasts] == ["1", "3"]
+    assert podcasts[1]["feed_url"] == "https://example.com/feed/3"
+    assert podcasts[1]["genre_names"] == "Music,Podcasts"
+
+
+def test_lookup_batches_are_split_at_batch_size(monkeypatch):
+    batch_size = itunes_popular_podcast_parser.LOOKUP_BATCH_SIZE
+    ids = [str(id) for id in range(1, 2 * batch_size + 2)]
+    requested = []
+    persisted = []
+
+    def get_podcasts_data(ids):
+        requested.append(ids)
+
+        return {"results": [lookup_result(id) for id in ids]}
+
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "get_html_content", lambda url: chart_page(ids)
+    )
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "get_podcasts_data", get_podcasts_data
+    )
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser,
+        "persist_data",
+        lambda podcasts, looked_up_at: persisted.extend(podcasts),
+    )
+    monkeypatch.setattr(
+        itunes_popular_podcast_parser, "get_lookup_cache", FreshLookupCache
+    )
+
+    assert process_message_in_thread({"categories_urls_to_parse": ["url-0"]}) == []
+
+    assert sorted(len(batch) for batch in requested) == [1, batch_size, batch_size]
+    assert sorted(sum(requested, []), key=int) == ids
+    assert len(persisted) == len(ids)
+
+
+def test_podcasts_are_upserted_in_collection_id_order(monkeypatch):
+    from contextlib import nullcontext
+    from datetime import datetime, timezone
+
+    executed = []
+
+    class Session:
+        def begin(self):
+            return nullcontext()
+
+        def execute(self, statement, rows):
+            executed.append(rows)
+
+    monkeypatch.setattr(itunes_popular_podcast_parser, "get_session", Session)
+
+    itunes_popular_podcast_parser.persist_data(
+        [
+            itunes_popular_podcast_parser.format_data(lookup_result(id))
+            for id in ("30", "4", "200", "4")
+        ],
+        datetime.now(timezone.utc),
+    )
+
+    (rows,) = executed
+
+    assert [row["collection_id"] for row in rows] == ["200", "30", "4"]
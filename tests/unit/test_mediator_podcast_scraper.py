@@ -0,0 +1,109 @@
+import json
+import threading
+import uuid
+from collections import namedtuple
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+import mediator_podcast_scraper
+
+ClaimedPodcast = namedtuple("ClaimedPodcast", ["id", "feed_url"])
+
+
+class StubEcsClient:
+    def __init__(self, running_tasks: int):
+        self.running_tasks = running_tasks
+        self.lock = threading.Lock()
+        self.launched_payloads = []
+
+    def get_paginator(self, operation_name):
+        running_tasks = self.running_tasks
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                return [{"taskArns": ["arn"] * running_tasks}]
+
+        return Paginator()
+
+    def run_task(self, **kwargs):
+        (container_override,) = kwargs["overrides"]["containerOverrides"]
+        (variable,) = container_override["environment"]
+
+        with self.lock:
+            self.launched_payloads.append(json.loads(variable["value"]))
+
+        return {"tasks": [{}], "failures": []}
+
+
+@pytest.fixture(autouse=True)
+def ecs_environment(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    monkeypatch.setenv("NUMBER_OF_PARALLEL_TASKS", "5")
+    monkeypatch.setenv("PODCASTS_PER_TASK", "3")
+    monkeypatch.setenv("ECS_CLUSTER", "cluster")
+
+
+def test_running_tasks_are_counted_across_pages():
+    client = boto3.client("ecs")
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "list_tasks",
+            {"taskArns": ["arn"] * 100, "nextToken": "page-2"},
+            {"cluster": "cluster", "launchType": "FARGATE"},
+        )
+        stubber.add_response(
+            "list_tasks",
+            {"taskArns": ["arn"] * 20},
+            {"cluster": "cluster", "launchType": "FARGATE", "nextToken": "page-2"},
+        )
+
+        assert (
+            mediator_podcast_scraper.get_current_number_of_running_tasks(client) == 120
+        )
+
+
+def test_podcasts_are_packed_into_task_payloads(monkeypatch):
+    client = StubEcsClient(running_tasks=2)
+    podcasts = [
+        ClaimedPodcast(uuid.uuid4(), f"https://feeds.example.com/{i}") for i in range(8)
+    ]
+    requested = []
+
+    def get_podcasts_to_scrape(number_of_podcasts):
+        requested.append(number_of_podcasts)
+        return podcasts
+
+    monkeypatch.setattr(mediator_podcast_scraper, "get_ecs_client", lambda: client)
+    monkeypatch.setattr(
+        mediator_podcast_scraper, "get_podcasts_to_scrape", get_podcasts_to_scrape
+    )
+
+    mediator_podcast_scraper.lambda_handler({}, None)
+
+    # Three free task slots, three podcasts per task
+    assert requested == [9]
+    assert sorted(len(payload) for payload in client.launched_payloads) == [2, 3, 3]
+    assert sorted(
+        podcast["id"] for payload in client.launched_payloads for podcast in payload
+    ) == sorted(str(podcast.id) for podcast in podcasts)
+
+
+def test_batches_fit_the_container_override_limit():
+    long_url = "https://feeds.example.com/" + "a" * 470
+    podcasts = [ClaimedPodcast(uuid.uuid4(), long_url) for i in range(25)] + [
+        ClaimedPodcast(uuid.uuid4(), f"https://feeds.example.com/{i}") for i in range(5)
+    ]
+
+    batches = mediator_podcast_scraper.get_batches(podcasts, 25)
+
+    assert all(
+        len(mediator_podcast_scraper.format_payload(batch).encode())
+        <= mediator_podcast_scraper.MAX_PAYLOAD_BYTES
+        for batch in batches
+    )
+    assert all(len(batch) <= 25 for batch in batches)
+    assert len(batches) > 2
+    assert [podcast for batch in batches for podcast in batch] == podcasts
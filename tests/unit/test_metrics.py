@@ -0,0 +1,47 @@
+import json
+
+import common.metrics as metrics
+
+
+def test_invocation_emits_single_emf_record(monkeypatch, capsys):
+    monkeypatch.setattr(metrics, "metrics_enabled", True)
+
+    @metrics.instrument("podcast_scraper")
+    def main():
+        with metrics.timer("feed_parse"):
+            metrics.add("episodes_found", 3)
+
+        metrics.add("episodes_found", 2)
+        metrics.add_bytes("feed_bytes", 1024)
+        metrics.add_host_stats("https://feeds.example.com/1", requests=1, bytes=10)
+        metrics.add_host_stats("https://feeds.example.com/2", requests=1, bytes=5)
+
+    main()
+
+    (line,) = capsys.readouterr().out.splitlines()
+    record = json.loads(line)
+
+    (directive,) = record["_aws"]["CloudWatchMetrics"]
+    units = {metric["Name"]: metric["Unit"] for metric in directive["Metrics"]}
+
+    assert units == {
+        "feed_parse": "Milliseconds",
+        "episodes_found": "Count",
+        "feed_bytes": "Bytes",
+    }
+    assert record["Service"] == "podcast_scraper"
+    assert record["episodes_found"] == 5
+    assert record["feed_bytes"] == 1024
+    assert record["hosts"] == {"feeds.example.com": {"requests": 2, "bytes": 15}}
+    assert metrics.current is metrics.no_op_metrics
+
+
+def test_disabled_metrics_emit_nothing(monkeypatch, capsys):
+    monkeypatch.setattr(metrics, "metrics_enabled", False)
+
+    with metrics.invocation("podcast_scraper") as invocation_metrics:
+        with metrics.timer("feed_parse"):
+            metrics.add("episodes_found")
+
+    assert invocation_metrics is metrics.no_op_metrics
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,364 @@
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">
+<channel>
+<title>Test podcast</title>
+<pubDate>Mon, 05 Dec 2022 10:00:00 +0000</pubDate>
+<item>
+<title>Episode 3</title>
+<link>https://example.com/3</link>
+<pubDate>Mon, 05 Dec 2022 10:00:00 +0000</pubDate>
+<guid>guid-3</guid>
+<itunes:episode>3</itunes:episode>
+<itunes:duration>01:00:00</itunes:duration>
+</item>
+<item>
+<title>Episode 2</title>
+<link>https://example.com/2</link>
+<pubDate>Mon, 28 Nov 2022 10:00:00 +0000</pubDate>
+<guid>guid-2</guid>
+<itunes:episode>2</itunes:episode>
+<itunes:duration>00:58:00</itunes:duration>
+</item>
+<item>
+<title>Episode 1</title>
+<link>https://example.com/1</link>
+<pubDate>Mon, 21 Nov 2022 10:00:00 +0000</pubDate>
+<guid>guid-1</guid>
+<itunes:episode>1</itunes:episode>
+<itunes:duration>00:45:00</itunes:duration>
+</item>
+</channel>
+</rss>
+"""
+
+
+def chunked(content: bytes, size: int = 16):
+    return (content[i : i + size] for i in range(0, len(content), size))
+
+
+def test_parse_feed_reads_all_episodes():
+    podcast_data, episodes_data = main.parse_feed(chunked(FEED), set())
+
+    assert podcast_data["name"] == "Test podcast"
+    assert podcast_data["published_date"].day == 5
+    assert [episode.external_id for episode in episodes_data] == [
+        "guid-3",
+        "guid-2",
+        "guid-1",
+    ]
+    assert episodes_data[0].episode_duration == "01:00:00"
+    assert episodes_data[0].episode_number == 3
+
+
+def test_parse_feed_stops_at_first_known_episode(monkeypatch):
+    monkeypatch.setattr(main, "CONTENT_DIGEST_ITEMS", 1)
+
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(FEED):
+            consumed.append(chunk)
+            yield chunk
+
+    _, episodes_data = main.parse_feed(chunks(), {"guid-2"})
+
+    assert [episode.external_id for episode in episodes_data] == ["guid-3"]
+    assert len(consumed) < len(list(chunked(FEED)))
+
+
+def test_parse_feed_matches_tree_parsing():
+    from lxml import etree
+
+    root = etree.fromstring(FEED)
+
+    _, episodes_data = main.parse_feed(chunked(FEED), set())
+
+    assert episodes_data == main.get_all_episodes_information(root)
+
+
+def test_parse_feed_tolerates_incomplete_items():
+    feed = (
+        FEED.replace(b"<guid>guid-2</guid>", b"")
+        .replace(
+            b"<itunes:episode>1</itunes:episode>",
+            b"<itunes:episode>S1</itunes:episode>",
+        )
+        .replace(b"<link>https://example.com/1</link>", b"")
+        .replace(b"<guid>guid-1</guid>", b"<!-- no guid -->")
+    )
+
+    _, episodes_data = main.parse_feed(chunked(feed), set())
+
+    assert [episode.external_id for episode in episodes_data] == [
+        "guid-3",
+        "https://example.com/2",
+    ]
+    assert episodes_data[1].episode_number == 2
+
+
+def test_parse_feed_skips_feed_with_same_content_digest(monkeypatch):
+    monkeypatch.setattr(main, "CONTENT_DIGEST_ITEMS", 2)
+
+    podcast_data, _ = main.parse_feed(chunked(FEED), set())
+
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(FEED):
+            consumed.append(chunk)
+            yield chunk
+
+    unchanged_data, episodes_data = main.parse_feed(
+        chunks(), set(), podcast_data["content_digest"]
+    )
+
+    assert unchanged_data["content_digest"] == podcast_data["content_digest"]
+    assert episodes_data == []
+    assert len(consumed) < len(list(chunked(FEED)))
+
+    new_episode = FEED.replace(b"guid-3", b"guid-4")
+    changed_data, episodes_data = main.parse_feed(
+        chunked(new_episode), {"guid-2"}, podcast_data["content_digest"]
+    )
+
+    assert changed_data["content_digest"] != podcast_data["content_digest"]
+    assert [episode.external_id for episode in episodes_data] == ["guid-4"]
+
+
+@pytest.fixture
+def feed_server():
+    from tools.local_pipeline.fake_server import FakeItunesServer
+
+    server = FakeItunesServer(
+        categories=1, podcasts_per_category=1, episodes_per_feed=3
+    )
+    server.start()
+
+    yield server
+
+    server.stop()
+
+
+def test_conditional_get_sends_stored_validators(feed_server):
+    url = f"{feed_server.base_url}/feed/1"
+
+    feed_response = main.get_xml_content(url)
+
+    assert not feed_response.not_modified
+    assert feed_response.etag == '"1-3"'
+    assert feed_response.last_modified == "Thu, 01 Dec 2022 00:00:00 GMT"
+    feed_response.response.close()
+
+    for etag, last_modified in (
+        (feed_response.etag, feed_response.last_modified),
+        (None, feed_response.last_modified),
+    ):
+        not_modified = main.get_xml_content(url, etag, last_modified)
+
+        assert not_modified.not_modified
+        assert not_modified.response is None
+        assert not_modified.etag == etag
+        assert not_modified.last_modified == last_modified
+
+    first, with_etag, with_date = feed_server.feed_request_headers
+
+    assert "If-None-Match" not in first and "If-Modified-Since" not in first
+    assert with_etag["If-None-Match"] == '"1-3"'
+    assert with_etag["If-Modified-Since"] == "Thu, 01 Dec 2022 00:00:00 GMT"
+    assert "If-None-Match" not in with_date
+    assert with_date["If-Modified-Since"] == "Thu, 01 Dec 2022 00:00:00 GMT"
+
+    # Changed feed is downloaded again
+    changed = main.get_xml_content(url, '"1-2"', None)
+
+    assert not changed.not_modified
+    changed.response.close()
+
+
+class StreamedResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        return iter([])
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def test_failed_feed_responses_are_closed(monkeypatch):
+    responses = []
+
+    def get(url, **kwargs):
+        responses.append(StreamedResponse(int(url.rsplit("/", 1)[-1])))
+        return responses[-1]
+
+    monkeypatch.setattr(main.http_client, "get", get)
+
+    assert main.get_xml_content("https://example.com/404") is None
+    assert main.get_xml_content("https://example.com/304", '"etag"').not_modified
+    assert all(response.closed for response in responses)
+
+    def get_known_episode_ids(podcast_id):
+        raise RuntimeError("Database is unavailable")
+
+    monkeypatch.setattr(main, "get_known_episode_ids", get_known_episode_ids)
+
+    stats = SimpleNamespace(episode_count=10)
+
+    with pytest.raises(RuntimeError):
+        main.fetch_feed(
+            "1", "https://example.com/200", main.PodcastCheck(None, None, None, stats)
+        )
+
+    assert responses[-1].status_code == 200 and responses[-1].closed
+
+
+def test_host_slot_is_released_before_persisting(monkeypatch):
+    import asyncio
+    import threading
+    from host_scheduler import HostScheduler
+
+    second_fetched = threading.Event()
+    persisted_while_fetching = []
+
+    def fetch_feed(podcast_id, feed_url, check):
+        if podcast_id == "2":
+            second_fetched.set()
+
+        return main.FetchedFeed(None)
+
+    def persist_feed(podcast_id, check, fetched):
+        # Second feed of the host can only be fetched while the first one
+        # is being persisted if the host slot has been released already
+        if podcast_id == "1":
+            persisted_while_fetching.append(second_fetched.wait(timeout=5))
+
+    monkeypatch.setattr(main, "get_podcast_check", lambda podcast_id: None)
+    monkeypatch.setattr(main, "fetch_feed", fetch_feed)
+    monkeypatch.setattr(main, "persist_feed", persist_feed)
+
+    asyncio.run(
+        main.scrape_podcasts(
+            [
+                {"id": "1", "feed_url": "https://example.com/1"},
+                {"id": "2", "feed_url": "https://example.com/2"},
+            ],
+            concurrency=2,
+            scheduler=HostScheduler(
+                requests_per_second=1000, burst=1000, max_connections_per_host=1
+            ),
+        )
+    )
+
+    assert persisted_while_fetching == [True]
+
+
+def test_check_interval_follows_publishing_frequency():
+    from datetime import datetime, timedelta, timezone
+    from refresh_interval import get_check_interval_from_summary
+
+    now = datetime(2022, 12, 5, tzinfo=timezone.utc)
+    year_ago = now - timedelta(days=365)
+
+    daily = get_check_interval_from_summary(now, timedelta(days=1), now)
+    weekly = get_check_interval_from_summary(now, timedelta(weeks=1), now)
+    dormant = get_check_interval_from_summary(year_ago, timedelta(weeks=1), now)
+
+    assert daily == timedelta(hours=1)
+    assert weekly == timedelta(hours=7)
+    assert dormant == timedelta(days=7)
+    assert get_check_interval_from_summary(now, None, now) == timedelta(days=1)
+    assert get_check_interval_from_summary(None, None, now) == timedelta(days=1)
+
+
+def test_failed_scrape_is_retried_later(monkeypatch):
+    import asyncio
+    from host_scheduler import HostScheduler
+
+    rescheduled = []
+
+    def fetch_feed(podcast_id, feed_url, check):
+        raise ValueError("Malformed feed")
+
+    def mark_podcast_checked(podcast_id, check_interval):
+        rescheduled.append((podcast_id, check_interval))
+
+        if podcast_id == "2":
+            raise RuntimeError("Database is unavailable")
+
+    monkeypatch.setattr(main, "get_podcast_check", lambda podcast_id: None)
+    monkeypatch.setattr(main, "fetch_feed", fetch_feed)
+    monkeypatch.setattr(main, "mark_podcast_checked", mark_podcast_checked)
+
+    asyncio.run(
+        main.scrape_podcasts(
+            [
+                {"id": "1", "feed_url": "https://a.com/1"},
+                {"id": "2", "feed_url": "https://b.com/2"},
+            ],
+            concurrency=2,
+            scheduler=HostScheduler(
+                requests_per_second=1000, burst=1000, max_connections_per_host=1
+            ),
+        )
+    )
+
+    assert sorted(rescheduled) == [
+        ("1", main.FAILED_CHECK_RETRY_INTERVAL),
+        ("2", main.FAILED_CHECK_RETRY_INTERVAL),
+    ]
+
+
+def test_copy_values_are_escaped():
+    from datetime import datetime, timezone
+
+    assert main.to_copy_value(None) == "\\N"
+    assert main.to_copy_value(7) == "7"
+    assert main.to_copy_value("a\tb\\c\nd\r") == "a\\tb\\\\c\\nd\\r"
+    assert (
+        main.to_copy_value(datetime(2022, 12, 5, 10, tzinfo=timezone.utc))
+        == "2022-12-05T10:00:00+00:00"
+    )
+
+
+def test_episodes_summary_of_inserted_episodes():
+    from collections import namedtuple
+    from datetime import datetime, timedelta, timezone
+
+    InsertedEpisode = namedtuple("InsertedEpisode", ["published_date", "external_id"])
+    now = datetime(2022, 12, 5, tzinfo=timezone.utc)
+
+    summary = main.get_episodes_summary(
+        [
+            InsertedEpisode(now - timedelta(days=14), "guid-1"),
+            InsertedEpisode(None, "guid-undated"),
+            InsertedEpisode(now, "guid-3"),
+            InsertedEpisode(now - timedelta(days=7), "guid-2"),
+        ]
+    )
+
+    assert summary["episode_count"] == 4
+    assert summary["dated_episode_count"] == 3
+    assert summary["earliest_published_date"] == now - timedelta(days=14)
+    assert summary["latest_published_date"] == now
+    assert summary["latest_external_id"] == "guid-3"
+    assert summary["average_publishing_interval"] == timedelta(days=7)
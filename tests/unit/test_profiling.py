@@ -0,0 +1,44 @@
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+import common.profiling as profiling
+
+
+def allocate_on_worker():
+    return [bytearray(1024) for _ in range(1000)]
+
+
+def handler():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return len(executor.submit(allocate_on_worker).result())
+
+
+def test_profile_covers_worker_threads(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "profilers", {"cprofile", "tracemalloc"})
+    monkeypatch.setattr(profiling, "output_dir", str(tmp_path))
+    monkeypatch.setattr(profiling, "snapshot_interval", 0.01)
+
+    assert profiling.profile("test")(handler)() == 1000
+
+    (profile_dump,) = tmp_path.glob("test-*.prof")
+    (memory_report,) = tmp_path.glob("test-*.tracemalloc.txt")
+
+    functions = {function for _, _, function in pstats.Stats(str(profile_dump)).stats}
+
+    assert "allocate_on_worker" in functions
+    assert "allocate_on_worker" in memory_report.read_text()
+
+
+def test_unsampled_invocations_are_not_profiled(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "profilers", {"cprofile"})
+    monkeypatch.setattr(profiling, "output_dir", str(tmp_path))
+    monkeypatch.setattr(profiling, "sample_rate", 0)
+
+    assert profiling.profile("test")(handler)() == 1000
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disabled_profiling_leaves_function_unwrapped(monkeypatch):
+    monkeypatch.setattr(profiling, "profilers", set())
+
+    assert profiling.profile("test")(handler) is handler
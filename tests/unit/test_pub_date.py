@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pub_date import parse_pub_date
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (
+            "Mon, 05 Dec 2022 10:00:00 +0000",
+            datetime(2022, 12, 5, 10, tzinfo=timezone.utc),
+        ),
+        (
+            "Mon, 05 Dec 2022 10:00:00 GMT",
+            datetime(2022, 12, 5, 10, tzinfo=timezone.utc),
+        ),
+        (
+            "Mon, 5 Dec 2022 05:00:00 EST",
+            datetime(2022, 12, 5, 10, tzinfo=timezone.utc),
+        ),
+        (
+            "Mon, 05 Dec 2022 10:00 +0000",
+            datetime(2022, 12, 5, 10, tzinfo=timezone.utc),
+        ),
+        (
+            "05 December 2022 11:30:15 +0100",
+            datetime(2022, 12, 5, 10, 30, 15, tzinfo=timezone.utc),
+        ),
+        (
+            "Mon, 05 Dec 22 10:00:00 -05:00",
+            datetime(2022, 12, 5, 15, tzinfo=timezone.utc),
+        ),
+        (
+            "Mon, 05 Dec 2022 10:00:00",
+            datetime(2022, 12, 5, 10, tzinfo=timezone.utc),
+        ),
+        (
+            "2022-12-05T10:00:00Z",
+            datetime(2022, 12, 5, 10, tzinfo=timezone.utc),
+        ),
+    ],
+)
+def test_parse_pub_date_variants(value, expected):
+    assert parse_pub_date(value) == expected
+
+
+def test_parse_pub_date_matches_strptime():
+    value = "Tue, 13 Sep 2022 18:45:07 +0200"
+
+    assert parse_pub_date(value) == datetime.strptime(value, "%a, %d %b %Y %H:%M:%S %z")
+    assert parse_pub_date(value).utcoffset() == timedelta(hours=2)
+
+
+@pytest.mark.parametrize("value", [None, "", "not a date", "Mon, 45 Foo 2022"])
+def test_parse_pub_date_returns_none_for_invalid_dates(value):
+    assert parse_pub_date(value) is None
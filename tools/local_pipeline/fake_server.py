@@ -0,0 +1,202 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FEED_PUBLISHED_AT = datetime(2022, 12, 1, tzinfo=timezone.utc)
+
+
+class FakeItunesServer(ThreadingHTTPServer):
+    """Serves synthetic Apple chart pages, Lookup API responses and RSS feeds.
+
+    Every response is delayed by `latency` seconds and `error_rate` of the
+    requests are answered with a 503, to exercise retries and failure paths.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        categories: int,
+        podcasts_per_category: int,
+        episodes_per_feed: int,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        super().__init__(("127.0.0.1", 0), FakeItunesHandler)
+        self.categories = categories
+        self.podcasts_per_category = podcasts_per_category
+        self.episodes_per_feed = episodes_per_feed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.feed_request_headers = []
+        self.errors = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    @property
+    def categories_url(self) -> str:
+        return f"{self.base_url}/genre/podcasts/id26"
+
+    @property
+    def lookup_url(self) -> str:
+        return f"{self.base_url}/lookup"
+
+    def get_category_podcast_ids(self, category: int) -> range:
+        # Neighbouring charts share half of their podcasts, like real ones do
+        start = category * self.podcasts_per_category // 2
+
+        return range(start + 1, start + self.podcasts_per_category + 1)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeItunesHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        kind = url.path.split("/")[1]
+
+        with server.lock:
+            server.requests[kind] = server.requests.get(kind, 0) + 1
+
+        time.sleep(server.latency)
+
+        if random.random() < server.error_rate:
+            with server.lock:
+                server.errors += 1
+
+            return self.respond(503, b"", "text/plain")
+
+        if kind == "genre":
+            return self.respond(200, self.categories_page(), "text/html")
+
+        if kind == "category":
+            return self.respond(
+                200, self.category_page(int(url.path.split("/")[-1])), "text/html"
+            )
+
+        if kind == "lookup":
+            ids = parse_qs(url.query)["id"][0].split(",")
+
+            return self.respond(200, self.lookup_response(ids), "application/json")
+
+        if kind == "feed":
+            id = url.path.split("/")[-1]
+            validators = {
+                "ETag": f'"{id}-{server.episodes_per_feed}"',
+                "Last-Modified": format_datetime(FEED_PUBLISHED_AT, usegmt=True),
+            }
+
+            with server.lock:
+                server.feed_request_headers.append(dict(self.headers))
+
+            # ETag takes precedence, dates are only compared without one
+            if "If-None-Match" in self.headers:
+                not_modified = self.headers["If-None-Match"] == validators["ETag"]
+            else:
+                not_modified = (
+                    self.headers.get("If-Modified-Since") == validators["Last-Modified"]
+                )
+
+            if not_modified:
+                return self.respond(304, b"", "application/rss+xml")
+
+            return self.respond(200, self.feed(id), "application/rss+xml", validators)
+
+        self.respond(404, b"", "text/plain")
+
+    def respond(self, status: int, body: bytes, content_type: str, headers={}):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+
+        for name, value in headers.items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def categories_page(self) -> bytes:
+        links = "".join(
+            f'<li><a href="{self.server.base_url}/category/{category}">'
+            f"Category {category}</a></li>"
+            for category in range(self.server.categories)
+        )
+
+        return (
+            '<html><body><div id="genre-nav">'
+            f'<ul class="list top-level-subgenres">{links}</ul>'
+            "</div></body></html>"
+        ).encode()
+
+    def category_page(self, category: int) -> bytes:
+        links = "".join(
+            f"<li><a href="
+            f'"https://podcasts.apple.com/us/podcast/podcast-{id}/id{id}">'
+            f"Podcast {id}</a></li>"
+            for id in self.server.get_category_podcast_ids(category)
+        )
+
+        return (
+            f'<html><body><div id="selectedcontent"><ul>{links}</ul>'
+            "</div></body></html>"
+        ).encode()
+
+    def lookup_response(self, ids) -> bytes:
+        results = [
+            {
+                "collectionId": int(id),
+                "trackId": int(id),
+                "collectionName": f"Podcast {id}",
+                "feedUrl": f"{self.server.base_url}/feed/{id}",
+                "genreIds": ["1310", "26"],
+                "genres": ["Music", "Podcasts"],
+            }
+            for id in ids
+        ]
+
+        return json.dumps({"resultCount": len(results), "results": results}).encode()
+
+    def feed(self, id: str) -> bytes:
+        published_at = FEED_PUBLISHED_AT
+        episodes = self.server.episodes_per_feed
+
+        items = "".join(
+            "<item>"
+            f"<title>Episode {number}</title>"
+            f"<link>{self.server.base_url}/episode/{id}/{number}</link>"
+            "<pubDate>"
+            f"{format_datetime(published_at - timedelta(weeks=episodes - number))}"
+            "</pubDate>"
+            f"<guid>{id}-{number}</guid>"
+            f"<itunes:episode>{number}</itunes:episode>"
+            "<itunes:duration>00:30:00</itunes:duration>"
+            "</item>"
+            for number in range(episodes, 0, -1)
+        )
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0" '
+            'xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">'
+            f"<channel><title>Podcast {id}</title>"
+            f"<pubDate>{format_datetime(published_at)}</pubDate>"
+            f"{items}</channel></rss>"
+        ).encode()
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,188 @@
+"""Runs category -> popular -> mediator -> scraper flow against local stand-ins.
+
+Apple pages, the Lookup API and RSS feeds are served by a local HTTP server,
+SQS and ECS are replaced by in-memory stand-ins, and podcasts are persisted
+into the database configured with the usual DB_* variables.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import types
+
+from .fake_server import FakeItunesServer
+from .stand_ins import FakeEcs, InMemorySqs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POPULAR_PODCASTS_QUEUE_URL = "local://popular-podcasts-fetch-queue"
+
+
+def setup_import_paths():
+    sys.path.insert(0, os.path.join(ROOT, "src", "lambdas"))
+    sys.path.insert(0, os.path.join(ROOT, "src", "tasks", "podcast_scraper", "src"))
+
+    # Layers are imported as `db` and `common` packages, as when deployed
+    for package, layer in (("db", "db_layer"), ("common", "common_layer")):
+        module = types.ModuleType(package)
+        module.__path__ = [os.path.join(ROOT, "src", layer)]
+        sys.modules.setdefault(package, module)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--podcasts-per-category", type=int, default=100)
+    parser.add_argument("--episodes-per-feed", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--parallel-tasks", type=int, default=5)
+    parser.add_argument("--podcasts-per-task", type=int, default=25)
+    parser.add_argument("--scraper-concurrency", type=int, default=10)
+    parser.add_argument("--host-requests-per-second", type=float, default=1000)
+    parser.add_argument("--tick", type=float, default=0.5)
+    parser.add_argument("--reset", action="store_true", help="truncate tables first")
+    parser.add_argument("--no-migrate", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+
+    return parser.parse_args()
+
+
+def percentile(values, percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def run(args) -> dict:
+    server = FakeItunesServer(
+        categories=args.categories,
+        podcasts_per_category=args.podcasts_per_category,
+        episodes_per_feed=args.episodes_per_feed,
+        latency=args.latency,
+        error_rate=args.error_rate,
+    )
+    server.start()
+
+    os.environ.update(
+        {
+            "ITUNES_PODCAST_CATEGORIES_URL": server.categories_url,
+            "ITUNES_LOOKUP_URL": server.lookup_url,
+            "POPULAR_PODCASTS_QUEUE_URL": POPULAR_PODCASTS_QUEUE_URL,
+            "NUMBER_OF_ITEMS_PER_CLUSTERS": "5",
+            "NUMBER_OF_PARALLEL_TASKS": str(args.parallel_tasks),
+            "PODCASTS_PER_TASK": str(args.podcasts_per_task),
+            "SCRAPER_CONCURRENCY": str(args.scraper_concurrency),
+            "HOST_REQUESTS_PER_SECOND": str(args.host_requests_per_second),
+            "HOST_BURST": str(int(args.host_requests_per_second)),
+            "HOST_MAX_CONNECTIONS": str(args.scraper_concurrency),
+            "HTTP_BACKOFF_FACTOR": "0.05",
+            "DB_POOL_SIZE": str(args.scraper_concurrency),
+            "AWS_DEFAULT_REGION": "eu-west-1",
+        }
+    )
+
+    setup_import_paths()
+
+    import itunes_category_parser
+    import itunes_popular_podcast_parser
+    import mediator_podcast_scraper
+    import main as podcast_scraper
+    from db.base import get_alembic_config, get_session
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    if not args.no_migrate:
+        from alembic import command
+
+        sys.path.insert(0, os.path.join(ROOT, "src", "db_layer"))
+        command.upgrade(get_alembic_config(), "head")
+
+    if args.reset:
+        session = get_session()
+
+        with session.begin():
+            session.execute("TRUNCATE podcast, podcast_episode CASCADE")
+
+    sqs = InMemorySqs()
+    itunes_category_parser.get_sqs_client = lambda: sqs
+
+    feed_latencies = []
+    fetch_feed = podcast_scraper.fetch_feed
+
+    def timed_fetch_feed(podcast_id: str, feed_url: str, check):
+        started_at = time.perf_counter()
+
+        try:
+            return fetch_feed(podcast_id, feed_url, check)
+        finally:
+            feed_latencies.append(time.perf_counter() - started_at)
+
+    podcast_scraper.fetch_feed = timed_fetch_feed
+
+    fake_ecs = FakeEcs(launch=podcast_scraper.run_scraper)
+    mediator_podcast_scraper.get_ecs_client = lambda: fake_ecs
+
+    stages = {}
+    started_at = time.perf_counter()
+
+    itunes_category_parser.lambda_handler({}, None)
+    stages["categories"] = time.perf_counter() - started_at
+
+    stage_started_at = time.perf_counter()
+
+    while sqs.size(POPULAR_PODCASTS_QUEUE_URL) > 0:
+        itunes_popular_podcast_parser.lambda_handler(
+            sqs.receive_event(POPULAR_PODCASTS_QUEUE_URL), None
+        )
+
+    stages["popular_podcasts"] = time.perf_counter() - stage_started_at
+
+    stage_started_at = time.perf_counter()
+
+    # Each tick stands for one scheduled mediator run, which stops once
+    # every podcast has been scraped and no task is left running
+    while True:
+        launched_tasks = fake_ecs.launched_tasks
+
+        mediator_podcast_scraper.lambda_handler({}, None)
+
+        if fake_ecs.launched_tasks == launched_tasks:
+            if len(fake_ecs.running_tasks()) == 0:
+                break
+
+        time.sleep(args.tick)
+
+    stages["scraping"] = time.perf_counter() - stage_started_at
+
+    elapsed = time.perf_counter() - started_at
+
+    server.stop()
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "stage_seconds": {stage: round(value, 3) for stage, value in stages.items()},
+        "feeds_scraped": len(feed_latencies),
+        "feeds_per_second": round(len(feed_latencies) / stages["scraping"], 2),
+        "feed_latency_seconds": {
+            "p50": round(percentile(feed_latencies, 50), 3),
+            "p95": round(percentile(feed_latencies, 95), 3),
+            "max": round(max(feed_latencies, default=0.0), 3),
+        },
+        "tasks_launched": fake_ecs.launched_tasks,
+        "http_requests": server.requests,
+        "http_errors_injected": server.errors,
+    }
+
+
+def main():
+    print(json.dumps(run(parse_args()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+import threading
+import uuid
+from collections import defaultdict, deque
+from typing import Callable, List
+
+
+class InMemorySqs:
+    """Stands in for the SQS client used by the Lambdas."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queues = defaultdict(deque)
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **kwargs) -> dict:
+        message_id = str(uuid.uuid4())
+
+        with self.lock:
+            self.queues[QueueUrl].append({"messageId": message_id, "body": MessageBody})
+
+        return {"MessageId": message_id}
+
+    def send_message_batch(self, QueueUrl: str, Entries: List[dict], **kwargs) -> dict:
+        successful = []
+
+        for entry in Entries:
+            response = self.send_message(QueueUrl, entry["MessageBody"])
+            successful.append({"Id": entry["Id"], "MessageId": response["MessageId"]})
+
+        return {"Successful": successful, "Failed": []}
+
+    def receive_event(self, queue_url: str, batch_size: int = 10) -> dict:
+        """Pops up to `batch_size` messages as a Lambda SQS event."""
+        with self.lock:
+            queue = self.queues[queue_url]
+            records = [queue.popleft() for _ in range(min(batch_size, len(queue)))]
+
+        return {"Records": records}
+
+    def size(self, queue_url: str) -> int:
+        with self.lock:
+            return len(self.queues[queue_url])
+
+
+class FakeEcs:
+    """Stands in for the ECS client, running every task on a local thread.
+
+    `launch` receives the podcasts from the task's PODCASTS_TO_SCRAPE override.
+    """
+
+    def __init__(self, launch: Callable[[List[dict]], None]):
+        self.launch = launch
+        self.lock = threading.Lock()
+        self.tasks = []
+        self.launched_tasks = 0
+
+    def run_task(self, overrides: dict, **kwargs) -> dict:
+        (container_override,) = overrides["containerOverrides"]
+        environment = {
+            variable["name"]: variable["value"]
+            for variable in container_override["environment"]
+        }
+
+        task = threading.Thread(
+            target=self.launch,
+            args=(json.loads(environment["PODCASTS_TO_SCRAPE"]),),
+            daemon=True,
+        )
+        task.start()
+
+        with self.lock:
+            self.tasks.append(task)
+            self.launched_tasks += 1
+
+        return {"tasks": [{"taskArn": task.name}], "failures": []}
+
+    def running_tasks(self) -> List[threading.Thread]:
+        with self.lock:
+            self.tasks = [task for task in self.tasks if task.is_alive()]
+
+            return list(self.tasks)
+
+    def get_paginator(self, operation_name: str):
+        fake_ecs = self
+
+        class ListTasksPaginator:
+            def paginate(self, **kwargs):
+                return [{"taskArns": [task.name for task in fake_ecs.running_tasks()]}]
+
+        return ListTasksPaginator()